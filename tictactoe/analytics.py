@@ -0,0 +1,249 @@
+##########################################
+# STREAMING LOG ANALYTICS                #
+##########################################
+# Aggregates game logs of any size in constant memory. Logs are read as a
+# chain of generators:
+#
+#   read_games(path)   GameRecords from a tests_str-style text log (plain
+#                      or .gz, "-" for stdin) or a binary record file
+#                      (records.py), detected by its header
+#   replay(games)      replays each game on bitboards, stopping at the
+#                      first win, and yields what happened
+#   Accumulator.add    buffers a chunk of games, then folds it into NumPy
+#                      counters with a few bincounts
+#
+# Positions are indexed like the tablebase (board plus side to move, see
+# tablebase.index). Collected: visits and results per position, results
+# and lengths per game, and "losing moves": the loser's last move in every
+# decided game, keyed by the position it was played from.
+#
+#   python analytics.py games.log more.rec --top 10 --json summary.json
+
+from array import array
+import argparse
+import functools
+import gzip
+import json
+import sys
+
+import numpy as np
+
+import bitboard
+import records
+import tablebase
+
+X_WON, O_WON, DRAW, INCOMPLETE = range(4)
+OUTCOMES = ('X', 'O', 'draw', 'incomplete')
+
+
+##########################################
+# PIPELINE                               #
+##########################################
+
+def _open_text(path):
+    if path == '-':
+        return sys.stdin
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', errors='replace')
+    return open(path, errors='replace')
+
+
+# Bot and replay logs repeat the same games over and over, so recently
+# parsed lines are kept (bounded, so memory stays constant)
+_from_text = functools.lru_cache(maxsize=1 << 16)(records.from_text)
+
+
+def read_games(path, starting_player='X'):
+    # GameRecords from one log, streamed
+    if path != '-':
+        with open(path, 'rb') as f:
+            if f.read(len(records.MAGIC)) == records.MAGIC:
+                f.seek(0)
+                yield from records.iter_records(f)
+                return
+    f = _open_text(path)
+    try:
+        for line in f:
+            line = line.strip()
+            if line and line[0] != '#':
+                yield _from_text(line, starting_player)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def replay(games):
+    # yields (outcome, positions, losing) per game: the position indexes
+    # visited, start included, and (position index, cell) of the loser's
+    # last move or None
+    for game in games:
+        x = o = 0
+        player = game.starting_player
+        positions = [tablebase.index(0, 0, player)]
+        last = {'X': None, 'O': None}
+        outcome = INCOMPLETE
+        for r, c in game.moves:
+            b = bitboard.bit(r, c)
+            if (x | o) & b:
+                continue  # taken cells are skipped, as in play
+            last[player] = (positions[-1], bitboard.cell(r, c))
+            if player == 'X':
+                x |= b
+                won = bitboard.FIRST_LINE[x] >= 0
+            else:
+                o |= b
+                won = bitboard.FIRST_LINE[o] >= 0
+            mover, player = player, 'O' if player == 'X' else 'X'
+            positions.append(tablebase.index(x, o, player))
+            if won:
+                outcome = X_WON if mover == 'X' else O_WON
+                break
+        else:
+            if x | o == bitboard.FULL:
+                outcome = DRAW
+        if outcome == X_WON:
+            losing = last['O']
+        elif outcome == O_WON:
+            losing = last['X']
+        else:
+            losing = None
+        yield outcome, positions, losing
+
+
+##########################################
+# ACCUMULATION                           #
+##########################################
+
+class Accumulator:
+    """ NumPy counters fed one replayed game at a time """
+
+    def __init__(self, chunk=1 << 16):
+        self.chunk = chunk
+        # (position, outcome) counts of the games that passed through it
+        self.position_results = np.zeros((tablebase.ENTRIES, len(OUTCOMES)), np.int64)
+        self.losing = np.zeros(tablebase.ENTRIES * bitboard.CELLS, np.int64)
+        self.lengths = np.zeros((len(OUTCOMES), bitboard.CELLS + 1), np.int64)
+        self._reset_buffers()
+
+    def _reset_buffers(self):
+        self._positions = array('q')  # position * 4 + outcome
+        self._losing = array('q')     # position * 9 + cell
+        self._games = array('q')      # outcome * 10 + length
+        self._pending = 0
+
+    def add(self, outcome, positions, losing):
+        self._positions.extend(p * 4 + outcome for p in positions)
+        if losing is not None:
+            self._losing.append(losing[0] * bitboard.CELLS + losing[1])
+        self._games.append(outcome * (bitboard.CELLS + 1) + len(positions) - 1)
+        self._pending += 1
+        if self._pending >= self.chunk:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        self.position_results += np.bincount(
+            np.frombuffer(self._positions, np.int64),
+            minlength=self.position_results.size).reshape(self.position_results.shape)
+        self.losing += np.bincount(np.frombuffer(self._losing, np.int64),
+                                   minlength=self.losing.size)
+        self.lengths += np.bincount(np.frombuffer(self._games, np.int64),
+                                    minlength=self.lengths.size).reshape(self.lengths.shape)
+        self._reset_buffers()
+
+    def consume(self, games):
+        for outcome, positions, losing in replay(games):
+            self.add(outcome, positions, losing)
+        self.flush()
+        return self
+
+    def summary(self, top=10):
+        self.flush()
+        per_outcome = self.lengths.sum(axis=1)
+        games = int(per_outcome.sum())
+        moves = int((self.lengths * np.arange(bitboard.CELLS + 1)).sum())
+        visits = self.position_results.sum(axis=1)
+        top_positions = []
+        for i in np.argsort(visits, kind='stable')[::-1][:top]:
+            if not visits[i]:
+                break
+            rates = self.position_results[i] / visits[i]
+            top_positions.append({
+                'position': position_text(i),
+                'visits': int(visits[i]),
+                **{f'{name}_rate': float(rate) for name, rate in zip(OUTCOMES, rates)},
+            })
+        top_losing = []
+        for k in np.argsort(self.losing, kind='stable')[::-1][:top]:
+            if not self.losing[k]:
+                break
+            position, cell = divmod(int(k), bitboard.CELLS)
+            top_losing.append({
+                'position': position_text(position),
+                'move': '%d,%d' % divmod(cell, bitboard.SIZE),
+                'count': int(self.losing[k]),
+            })
+        return {
+            'games': games,
+            'results': {name: int(n) for name, n in zip(OUTCOMES, per_outcome)},
+            'mean_length': moves / games if games else 0.0,
+            'lengths': [int(n) for n in self.lengths.sum(axis=0)],
+            'distinct_positions': int(np.count_nonzero(visits)),
+            'top_positions': top_positions,
+            'top_losing_moves': top_losing,
+        }
+
+
+def position_text(i):
+    # tablebase index -> "XO-/-X-/--O X to move"
+    b, side = divmod(int(i), 2)
+    cells = []
+    for _ in range(bitboard.CELLS):
+        b, digit = divmod(b, 3)
+        cells.append('-XO'[digit])
+    rows = (''.join(cells[r * 3:r * 3 + 3]) for r in range(bitboard.SIZE))
+    return f'{"/".join(rows)} {"XO"[side]} to move'
+
+
+def analyse_logs(paths, starting_player='X', chunk=1 << 16):
+    acc = Accumulator(chunk)
+    for path in paths:
+        acc.consume(read_games(path, starting_player))
+    return acc
+
+
+def print_summary(s):
+    games = s['games'] or 1
+    print(f'{s["games"]} games, {s["distinct_positions"]} distinct positions, '
+          f'mean length {s["mean_length"]:.2f}')
+    print('  '.join(f'{name} {n / games:.1%}' for name, n in s['results'].items()))
+    print('length ' + ' '.join(f'{i}:{n}' for i, n in enumerate(s['lengths']) if n))
+    print(f'\n{"most visited positions":28s} {"visits":>10s} {"X win":>6s} '
+          f'{"O win":>6s} {"draw":>6s}')
+    for p in s['top_positions']:
+        print(f'{p["position"]:28s} {p["visits"]:10d} {p["X_rate"]:6.1%} '
+              f'{p["O_rate"]:6.1%} {p["draw_rate"]:6.1%}')
+    print(f'\n{"most common losing moves":28s} {"move":>5s} {"count":>10s}')
+    for m in s['top_losing_moves']:
+        print(f'{m["position"]:28s} {m["move"]:>5s} {m["count"]:10d}')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Streaming tictactoe log analytics')
+    parser.add_argument('logs', nargs='+',
+                        help='text logs (.gz ok, - for stdin) or binary record files')
+    parser.add_argument('--starting-player', default='X', choices=('X', 'O'),
+                        help='who moves first in text logs')
+    parser.add_argument('--top', type=int, default=10, help='rows per table')
+    parser.add_argument('--json', dest='json_path', help='also write the summary as JSON')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    summary = analyse_logs(args.logs, args.starting_player).summary(args.top)
+    print_summary(summary)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(summary, f, indent=2)
@@ -0,0 +1,130 @@
+##########################################
+# BATCH BOARD EVALUATION (NUMPY)         #
+##########################################
+# Vectorized counterparts of get_winner and its row/col/diag helpers.
+# Boards come in as either
+#   - an (N, 3, 3) int8 array with EMPTY, X and O cell codes, or
+#   - an (N, 2) integer array of (x, o) bitboards (see bitboard.py)
+# and every function evaluates all N boards in one call.
+#
+# Winners come back as int8 codes (EMPTY for no winner, X, O) and winning
+# lines as indexes into bitboard.LINES (-1 for none): 0-2 are rows, 3-5
+# columns, 6 diagonal 0 and 7 diagonal 1.
+#
+# batch_move_is_valid checks many (row, col) moves against many boards at
+# once, for fuzzing and replay pipelines.
+
+import numpy as np
+
+import bitboard
+
+EMPTY = 0
+X = 1
+O = 2
+WINNER_NAMES = (None, 'X', 'O')
+_CODES = {'-': EMPTY, 'X': X, 'O': O}
+
+_WEIGHTS = (1 << np.arange(bitboard.CELLS, dtype=np.int32))
+
+
+def _first_line_table(lines, offset):
+    # for every 9-bit bitboard: index into bitboard.LINES of the first line
+    # from lines it covers, or -1
+    table = np.full(bitboard.FULL + 1, -1, dtype=np.int8)
+    for b in range(bitboard.FULL + 1):
+        i = bitboard.first_line(b, lines)
+        if i >= 0:
+            table[b] = i + offset
+    return table
+
+
+_ALL = _first_line_table(bitboard.LINES, 0)
+_ROWS = _first_line_table(bitboard.ROW_LINES, 0)
+_COLS = _first_line_table(bitboard.COL_LINES, len(bitboard.ROW_LINES))
+_DIAG = _first_line_table(bitboard.DIAG_LINES,
+                          len(bitboard.ROW_LINES) + len(bitboard.COL_LINES))
+
+
+def encode_boards(boards):
+    # list of list-of-lists boards -> (N, 3, 3) int8 array
+    out = np.empty((len(boards), bitboard.SIZE, bitboard.SIZE), dtype=np.int8)
+    for i, board in enumerate(boards):
+        for r, row in enumerate(board):
+            for c, cell in enumerate(row):
+                out[i, r, c] = _CODES[cell]
+    return out
+
+
+def to_bitboards(boards):
+    # returns (x, o) int32 arrays from either accepted input layout
+    boards = np.asarray(boards)
+    if not np.issubdtype(boards.dtype, np.integer):
+        # strings would compare unequal to every code and read as empty
+        raise ValueError(f'expected integer boards, got dtype {boards.dtype}; '
+                         f'encode_boards converts list-of-lists boards')
+    if boards.ndim == 2 and boards.shape[1] == 2:
+        if boards.size and (boards.min() < 0 or boards.max() > bitboard.FULL):
+            raise ValueError(f'bitboards must be in 0..{bitboard.FULL}')
+        return boards[:, 0].astype(np.int32), boards[:, 1].astype(np.int32)
+    if boards.ndim != 3 or boards.shape[1:] != (bitboard.SIZE, bitboard.SIZE):
+        raise ValueError(f'expected (N, 3, 3) or (N, 2) boards, got {boards.shape}')
+    flat = boards.reshape(len(boards), bitboard.CELLS)
+    return (flat == X) @ _WEIGHTS, (flat == O) @ _WEIGHTS
+
+
+def _evaluate(x, o, table):
+    lx, lo = table[x], table[o]
+    # the line checked first decides, like the scalar functions
+    x_wins = (lx >= 0) & ((lo < 0) | (lx < lo))
+    o_wins = (lo >= 0) & ~x_wins
+    winners = np.where(x_wins, X, np.where(o_wins, O, EMPTY)).astype(np.int8)
+    lines = np.where(x_wins, lx, lo)
+    return winners, lines
+
+
+def batch_get_winner(boards):
+    # returns (winners, ties, lines) for every board
+    x, o = to_bitboards(boards)
+    winners, lines = _evaluate(x, o, _ALL)
+    ties = (winners == EMPTY) & ((x | o) == bitboard.FULL)
+    return winners, ties, lines
+
+
+def batch_get_winner_rows(boards):
+    # returns (winners, lines) looking at rows only
+    return _evaluate(*to_bitboards(boards), _ROWS)
+
+
+def batch_get_winner_cols(boards):
+    return _evaluate(*to_bitboards(boards), _COLS)
+
+
+def batch_get_winner_diag(boards):
+    return _evaluate(*to_bitboards(boards), _DIAG)
+
+
+##########################################
+# MOVE VALIDATION                        #
+##########################################
+
+def batch_legal_masks(boards):
+    # mask of empty cells per board, bit row * 3 + col
+    x, o = to_bitboards(boards)
+    return bitboard.FULL & ~(x | o)
+
+
+def batch_move_is_valid(boards, moves, board_index=None):
+    # moves is an (M, 2) array of (row, col). Move i is checked against
+    # board board_index[i], or board i when board_index is None (then M must
+    # equal N). Returns an (M,) bool array: in range and on an empty cell
+    legal = batch_legal_masks(boards)
+    moves = np.asarray(moves, dtype=np.int64).reshape(-1, 2)
+    rows, cols = moves[:, 0], moves[:, 1]
+    if board_index is None:
+        if len(moves) != len(legal):
+            raise ValueError(f'{len(moves)} moves for {len(legal)} boards; '
+                             f'pass board_index')
+        board_index = np.arange(len(moves))
+    in_range = (rows >= 0) & (rows < bitboard.SIZE) & (cols >= 0) & (cols < bitboard.SIZE)
+    cells = np.where(in_range, rows * bitboard.SIZE + cols, 0)
+    return in_range & ((legal[np.asarray(board_index)] >> cells) & 1).astype(bool)
@@ -0,0 +1,238 @@
+##########################################
+# BENCHMARKS                             #
+##########################################
+# Reproducible timings for the hot paths of main.py and the harnesses.
+# Every benchmark runs a fixed, seeded workload of `number` operations per
+# sample, and every operation is timed on its own (less the cost of
+# reading the clock). Results report:
+#   ops_per_sec        median over the samples, the figure compared
+#                      against a baseline: one slow sample (a context
+#                      switch, a cache flush) doesn't move it
+#   best_ops_per_sec   fastest sample
+#   p50/p95/p99        latency percentiles over every single operation
+#
+#   python bench.py                          run and print
+#   python bench.py --save baseline.json     also save the results
+#   python bench.py --compare baseline.json  fail (exit 1) when any
+#                                            benchmark's median is more
+#                                            than --threshold slower
+
+from io import StringIO
+import argparse
+import gc
+import importlib.util
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import game
+import main
+import mnk
+import render
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _load_harness(filename, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(HERE, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+e2e = _load_harness('e2e_tests-1.py', 'e2e_tests')
+unit = _load_harness('unit_tests-3.py', 'unit_tests')
+
+
+##########################################
+# WORKLOADS                              #
+##########################################
+
+def sample_boards(n=512, seed=1234):
+    # positions from seeded random games, every stage of the game included
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < n:
+        board = mnk.new_board()
+        cells = [(r, c) for r in range(3) for c in range(3)]
+        rng.shuffle(cells)
+        player = 'X'
+        for r, c in cells[:rng.randint(0, 9)]:
+            board[r][c] = player
+            player = 'O' if player == 'X' else 'X'
+        boards.append(board)
+    return boards
+
+
+MOVE_STRINGS = ['0,0', '2, 0', '  1 ,   2 ', '(1,1)', 'a,0', '1 0', '0,0,3', '']
+
+
+def _cycle_call(f, args_list):
+    it = itertools.cycle(args_list)
+    return lambda: f(*next(it))
+
+
+def _replay_all():
+    for _, moves in e2e.parse_tests():
+        game.run_game(mnk.TICTACTOE, moves, 'X', echo=False)
+
+
+def _replay_echo(renderer):
+    def op():
+        for _, moves in e2e.parse_tests():
+            game.run_game(mnk.TICTACTOE, moves, 'X', echo=renderer)
+    return op
+
+
+def _unit_harness():
+    names = unit.REGISTERED_FNAMES[unit.COMPLETE]
+    unit.run_tests(main, names, unit.COMPLETE)
+
+
+def benchmarks():
+    # name -> (callable doing one op, ops per sample)
+    boards = [(b,) for b in sample_boards()]
+    moves = [(b, (r, c)) for (b,), (r, c) in zip(boards, itertools.cycle(
+        [(r, c) for r in range(3) for c in range(3)]))]
+    return {
+        'get_winner': (_cycle_call(main.get_winner, boards), 2000),
+        'get_winner_rows': (_cycle_call(main.get_winner_rows, boards), 2000),
+        'get_winner_cols': (_cycle_call(main.get_winner_cols, boards), 2000),
+        'get_winner_diag': (_cycle_call(main.get_winner_diag, boards), 2000),
+        'move_is_valid': (_cycle_call(main.move_is_valid, moves), 2000),
+        'input_str_is_valid': (_cycle_call(main.input_str_is_valid,
+                                           [(s,) for s in MOVE_STRINGS]), 2000),
+        'hint': (_cycle_call(main.hint, [(b, 'X') for (b,) in boards]), 2000),
+        'replay_tests_str': (_replay_all, 20),
+        'replay_echo_stream': (_replay_echo(render.StreamRenderer()), 20),
+        'replay_echo_diff': (_replay_echo(render.DiffRenderer()), 20),
+        'unit_harness': (_unit_harness, 2),
+    }
+
+
+##########################################
+# RUNNER                                 #
+##########################################
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def timer_overhead(n=10000):
+    # the least perf_counter reports between two back-to-back reads
+    clock = time.perf_counter
+    least = float('inf')
+    for _ in range(n):
+        start = clock()
+        least = min(least, clock() - start)
+    return least
+
+
+def measure(op, number, repeat, overhead=0.0):
+    # output from the code under test is swallowed so terminal speed
+    # doesn't end up in the numbers
+    latencies = []
+    samples = []
+    clock = time.perf_counter
+    old_stdout = sys.stdout
+    sys.stdout = sink = StringIO()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(number):  # warm-up
+            op()
+        for _ in range(repeat):
+            sink.seek(0)
+            sink.truncate()
+            sample = 0.0
+            for _ in range(number):
+                start = clock()
+                op()
+                elapsed = max(clock() - start - overhead, 0.0)
+                latencies.append(elapsed)
+                sample += elapsed
+            samples.append(number / sample if sample else float('inf'))
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+        sys.stdout = old_stdout
+    return {
+        'ops_per_sec': percentile(samples, 50),
+        'best_ops_per_sec': max(samples),
+        'p50_us': percentile(latencies, 50) * 1e6,
+        'p95_us': percentile(latencies, 95) * 1e6,
+        'p99_us': percentile(latencies, 99) * 1e6,
+    }
+
+
+def run(names=None, repeat=30):
+    results = {}
+    overhead = timer_overhead()
+    for name, (op, number) in benchmarks().items():
+        if names and name not in names:
+            continue
+        results[name] = measure(op, number, repeat, overhead)
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'repeat': repeat,
+        'timer_overhead_ns': overhead * 1e9,
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold):
+    # list of (name, baseline ops/sec, current ops/sec) whose median
+    # sample got slower by more than threshold
+    regressions = []
+    for name, result in report['results'].items():
+        base = baseline['results'].get(name)
+        if base and result['ops_per_sec'] < base['ops_per_sec'] * (1 - threshold):
+            regressions.append((name, base['ops_per_sec'], result['ops_per_sec']))
+    return regressions
+
+
+def print_report(report, baseline=None):
+    print(f'{"benchmark":20s} {"ops/sec":>12s} {"p50 us":>10s} {"p95 us":>10s} '
+          f'{"p99 us":>10s}' + ('   vs baseline' if baseline else ''))
+    for name, r in report['results'].items():
+        line = (f'{name:20s} {r["ops_per_sec"]:12.0f} {r["p50_us"]:10.2f} '
+                f'{r["p95_us"]:10.2f} {r["p99_us"]:10.2f}')
+        if baseline and name in baseline['results']:
+            change = r['ops_per_sec'] / baseline['results'][name]['ops_per_sec'] - 1
+            line += f'   {change:+8.1%}'
+        print(line)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='tictactoe benchmarks')
+    parser.add_argument('names', nargs='*', help='benchmarks to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=30, help='samples per benchmark')
+    parser.add_argument('--save', help='write results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed slowdown before failing (0.2 = 20%%)')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    report = run(args.names, args.repeat)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+    if baseline:
+        regressions = compare(report, baseline, args.threshold)
+        for name, base, cur in regressions:
+            print(f'REGRESSION {name}: {base:.0f} -> {cur:.0f} ops/sec')
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,197 @@
+##########################################
+# BITBOARD ENGINE                        #
+##########################################
+# Each player is stored as a 9-bit integer. Bit (row*3 + col) is set when
+# the player owns that cell, so cell 0 is the top-left corner and cell 8 is
+# the bottom-right corner.
+
+SIZE = 3
+CELLS = SIZE * SIZE
+FULL = (1 << CELLS) - 1
+
+# Winning lines, in the same order the list-of-lists functions check them:
+# rows top to bottom, columns left to right, then diagonal 0 and diagonal 1
+ROW_LINES = (0b000000111, 0b000111000, 0b111000000)
+COL_LINES = (0b001001001, 0b010010010, 0b100100100)
+DIAG_LINES = (0b100010001, 0b001010100)
+LINES = ROW_LINES + COL_LINES + DIAG_LINES
+
+PLAYERS = ('X', 'O')
+EMPTY = '-'
+
+
+def cell(row, col):
+    return row * SIZE + col
+
+
+def bit(row, col):
+    return 1 << (row * SIZE + col)
+
+
+def first_line(bits, lines=LINES):
+    # index of the first line in lines that bits fully covers, or -1
+    for i, mask in enumerate(lines):
+        if bits & mask == mask:
+            return i
+    return -1
+
+
+# first_line(bits) for every possible player bitboard, so a full win check
+# is a single list index
+FIRST_LINE = [first_line(b) for b in range(FULL + 1)]
+# the same for the rows, columns and diagonals alone
+FIRST_ROW = [first_line(b, ROW_LINES) for b in range(FULL + 1)]
+FIRST_COL = [first_line(b, COL_LINES) for b in range(FULL + 1)]
+FIRST_DIAG = [first_line(b, DIAG_LINES) for b in range(FULL + 1)]
+
+
+def _board_strings():
+    # every 3x3 board written out as its 9 cells -> (x, o)
+    table = {'': (0, 0)}
+    for c in range(CELLS):
+        b = 1 << c
+        table = {s + mark: bits
+                 for s, (x, o) in table.items()
+                 for mark, bits in (('-', (x, o)), ('X', (x | b, o)), ('O', (x, o | b)))}
+    return table
+
+
+_BY_STRING = _board_strings()
+
+
+def from_board(board):
+    # converts a list-of-lists board into (x, o) bitboards. A 3x3 board of
+    # '-', 'X' and 'O' is a single dict lookup; any other cell value or
+    # shape takes the cell loop
+    try:
+        r0, r1, r2 = board
+        return _BY_STRING[''.join(r0) + ''.join(r1) + ''.join(r2)]
+    except (KeyError, TypeError, ValueError):
+        pass
+    x = o = 0
+    b = 1
+    for row in board:
+        for c in row:
+            if c == 'X':
+                x |= b
+            elif c == 'O':
+                o |= b
+            b <<= 1
+    return x, o
+
+
+def to_board(x, o):
+    # converts (x, o) bitboards back into a list-of-lists board
+    board = []
+    for r in range(SIZE):
+        row = []
+        for c in range(SIZE):
+            b = bit(r, c)
+            row.append('X' if x & b else 'O' if o & b else EMPTY)
+        board.append(row)
+    return board
+
+
+def winner(x, o, table=FIRST_LINE):
+    # returns 'X', 'O' or None, judged on the lines of table (FIRST_LINE,
+    # FIRST_ROW, FIRST_COL or FIRST_DIAG). When both players own a line
+    # (only possible on hand-built boards) the line checked first wins,
+    # like get_winner
+    lx, lo = table[x], table[o]
+    if lx < 0 and lo < 0:
+        return None
+    if lo < 0 or (0 <= lx < lo):
+        return 'X'
+    return 'O'
+
+
+# The diagonals only need their five cells (the corners and the centre, in
+# cell order), so get_winner_diag looks a board up by those instead of
+# converting all of it
+DIAG_CELLS = (0, 2, 4, 6, 8)
+DIAG_WINNER = {''.join(s[c] for c in DIAG_CELLS): winner(x, o, FIRST_DIAG)
+               for s, (x, o) in _BY_STRING.items()
+               if all(s[c] == EMPTY for c in range(CELLS) if c not in DIAG_CELLS)}
+
+
+def winning_line(x, o):
+    # index into LINES of the line that decides the game, or -1
+    lx, lo = FIRST_LINE[x], FIRST_LINE[o]
+    if lx < 0:
+        return lo
+    if lo < 0:
+        return lx
+    return min(lx, lo)
+
+
+def legal_mask(x, o):
+    # empty cells as a bitmask
+    return FULL & ~(x | o)
+
+
+def is_full(x, o):
+    return (x | o) == FULL
+
+
+def iter_cells(mask):
+    # yields the cell index of every set bit, lowest first
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+##########################################
+# SYMMETRIES                             #
+##########################################
+
+# The 8 symmetries as (row, col) -> (row, col) maps: 4 rotations, then the
+# 4 reflections
+_N = SIZE - 1
+_MAPS = (
+    lambda r, c: (r, c),
+    lambda r, c: (c, _N - r),
+    lambda r, c: (_N - r, _N - c),
+    lambda r, c: (_N - c, r),
+    lambda r, c: (r, _N - c),
+    lambda r, c: (_N - r, c),
+    lambda r, c: (c, r),
+    lambda r, c: (_N - c, _N - r),
+)
+
+
+def _perm_table(perm):
+    # bitboard -> transformed bitboard for every 9-bit value; each entry
+    # extends the one without its lowest bit
+    table = [0] * (FULL + 1)
+    for bits in range(1, FULL + 1):
+        low = bits & -bits
+        table[bits] = table[bits ^ low] | (1 << perm[low.bit_length() - 1])
+    return table
+
+
+def _build_symmetries():
+    forward, inverse = [], []
+    for f in _MAPS:
+        perm = [cell(*f(*divmod(c, SIZE))) for c in range(CELLS)]
+        inv = [0] * CELLS
+        for c, p in enumerate(perm):
+            inv[p] = c
+        forward.append(_perm_table(perm))
+        inverse.append(_perm_table(inv))
+    return forward, inverse
+
+
+# SYMMETRIES[s][bits] applies symmetry s, INVERSES[s][bits] undoes it
+SYMMETRIES, INVERSES = _build_symmetries()
+
+
+def canonical(x, o):
+    # returns (key, sym): the smallest key x | (o << 9) over all symmetries
+    # and the symmetry that produces it
+    best, best_sym = None, 0
+    for s, t in enumerate(SYMMETRIES):
+        key = t[x] | (t[o] << CELLS)
+        if best is None or key < best:
+            best, best_sym = key, s
+    return best, best_sym
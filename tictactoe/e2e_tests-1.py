@@ -1,7 +1,17 @@
 from importlib import import_module
+from io import StringIO
+import multiprocessing
+import xml.etree.ElementTree as ET
+import argparse
+import json
+import signal
+import sys
+import time
 import traceback
 import re
 
+from harness import CallTimeout, load_script, raise_timeout
+
 ##########################################
 # CLASS FOR COOL, FANCY COLORS. YAY!     #
 ##########################################
@@ -222,6 +232,211 @@ def run_tests():
         i += 1
 
 
+##########################################
+# HEADLESS MODE                          #
+##########################################
+# Runs every game in a process pool with no keyboard interaction, checks
+# the winner, the number of valid moves and the winning line against the
+# expected results, and writes a JSON and/or JUnit XML report.
+#
+# play_game only returns the winner, so the move count and winning line
+# are read from the last board the script printed (three "X|O|-" rows).
+
+BOARD_ROW = re.compile(r'^\s*([XO-])\s*\|\s*([XO-])\s*\|\s*([XO-])\s*$')
+
+# Same names as the "method" field of tests_str
+LINES = {
+    'r0': ((0, 0), (0, 1), (0, 2)),
+    'r1': ((1, 0), (1, 1), (1, 2)),
+    'r2': ((2, 0), (2, 1), (2, 2)),
+    'c0': ((0, 0), (1, 0), (2, 0)),
+    'c1': ((0, 1), (1, 1), (2, 1)),
+    'c2': ((0, 2), (1, 2), (2, 2)),
+    'd0': ((0, 0), (1, 1), (2, 2)),
+    'd1': ((0, 2), (1, 1), (2, 0)),
+}
+
+
+def last_board(output):
+    # last three consecutive board rows printed, or None
+    board, rows = None, []
+    for line in output.split('\n'):
+        m = BOARD_ROW.match(line)
+        if m:
+            rows.append(list(m.groups()))
+            if len(rows) == 3:
+                board, rows = rows, []
+        else:
+            rows = []
+    return board
+
+
+def winning_line(board):
+    for name, cells in LINES.items():
+        marks = {board[r][c] for r, c in cells}
+        if len(marks) == 1 and '-' not in marks:
+            return name
+    return '-'
+
+
+def play_headless(script, moves, timeout):
+    # Runs in a worker: plays one game with stdout captured and stdin empty.
+    # Returns a dict describing what happened
+    outcome = {'status': 'ok', 'winner': None, 'board': None, 'error': None}
+    old_stdout, old_stdin = sys.stdout, sys.stdin
+    has_alarm = hasattr(signal, 'SIGALRM')
+    start = time.perf_counter()
+    try:
+        play_game = load_script(script).play_game
+        sys.stdout, sys.stdin = StringIO(), StringIO('')
+        if has_alarm:
+            signal.signal(signal.SIGALRM, raise_timeout)
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        outcome['winner'] = play_game(list(moves), 'X')
+    except CallTimeout:
+        outcome['status'] = 'timeout'
+    except SystemExit:
+        outcome['status'] = 'error'
+        outcome['error'] = 'script exited using quit() or exit()'
+    except Exception:
+        outcome['status'] = 'error'
+        outcome['error'] = traceback.format_exc()
+    finally:
+        if has_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        output = sys.stdout.getvalue() if isinstance(sys.stdout, StringIO) else ''
+        sys.stdout, sys.stdin = old_stdout, old_stdin
+    outcome['seconds'] = time.perf_counter() - start
+    outcome['board'] = last_board(output)
+    if outcome['winner'] is not None:
+        outcome['winner'] = str(outcome['winner'])
+    return outcome
+
+
+def check_game(results, outcome):
+    # list of failure messages, empty when the game matches results
+    exp_winner, exp_moves, exp_line = results
+    if outcome['status'] != 'ok':
+        return [outcome['error'] or outcome['status']]
+    failures = []
+    if exp_winner in ('X', 'O'):
+        if outcome['winner'] != exp_winner:
+            failures.append(f'winner {outcome["winner"]!r}, expected {exp_winner!r}')
+    elif outcome['winner'] is not None:
+        failures.append(f'winner {outcome["winner"]!r}, expected no winner')
+    board = outcome['board']
+    if board is None:
+        failures.append('no board was printed')
+        return failures
+    n_moves = sum(cell != '-' for row in board for cell in row)
+    if n_moves != exp_moves:
+        failures.append(f'{n_moves} valid moves, expected {exp_moves}')
+    line = winning_line(board)
+    if line != exp_line:
+        failures.append(f'winning line {line}, expected {exp_line}')
+    return failures
+
+
+def write_json(path, report):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+def write_junit(path, report):
+    suite = ET.Element('testsuite', name='e2e_tests', tests=str(report['total']),
+                       failures=str(report['failed']), errors=str(report['errors']),
+                       time=f'{report["seconds"]:.3f}')
+    for game in report['games']:
+        case = ET.SubElement(suite, 'testcase', classname=report['script'],
+                             name=f'game_{game["index"]:03d}',
+                             time=f'{game["seconds"]:.3f}')
+        if game['status'] != 'ok':
+            ET.SubElement(case, 'error', message=game['status']).text = '\n'.join(game['failures'])
+        elif game['failures']:
+            ET.SubElement(case, 'failure', message=game['failures'][0]).text = '\n'.join(game['failures'])
+    ET.ElementTree(suite).write(path, encoding='unicode', xml_declaration=True)
+
+
+def run_headless(script='tictactoe', tier=COMPLETE, jobs=None, timeout=5.0,
+                 json_path=None, junit_path=None):
+    tests = filter_tests(parse_tests(), tier)
+    start = time.perf_counter()
+    with multiprocessing.Pool(jobs) as pool:
+        pending = [pool.apply_async(play_headless, (script, moves, timeout))
+                   for _, moves in tests]
+        games = []
+        for i, ((results, moves), job) in enumerate(zip(tests, pending)):
+            try:
+                # the alarm in the worker normally fires first; this catches
+                # scripts that block signals
+                outcome = job.get(timeout + 5)
+            except multiprocessing.TimeoutError:
+                outcome = {'status': 'timeout', 'winner': None, 'board': None,
+                           'error': None, 'seconds': timeout}
+            failures = check_game(results, outcome)
+            games.append({
+                'index': i + 1,
+                'moves': moves,
+                'expected': {'winner': results[0], 'valid_moves': results[1],
+                             'line': results[2]},
+                'actual': {'winner': outcome['winner'], 'board': outcome['board']},
+                'status': outcome['status'],
+                'failures': failures,
+                'seconds': outcome['seconds'],
+            })
+        pool.terminate()
+
+    report = {
+        'script': script,
+        'tier': ('base', 'moderate', 'complete')[tier],
+        'total': len(games),
+        'passed': sum(not g['failures'] for g in games),
+        'failed': sum(bool(g['failures']) and g['status'] == 'ok' for g in games),
+        'errors': sum(g['status'] != 'ok' for g in games),
+        'seconds': time.perf_counter() - start,
+        'games': games,
+    }
+    if json_path:
+        write_json(json_path, report)
+    if junit_path:
+        write_junit(junit_path, report)
+    return report
+
+
+def print_report(report):
+    for game in report['games']:
+        if game['failures']:
+            print(f'[ {Colors.RED}FAIL{Colors.END} ]  game {game["index"]}: '
+                + '; '.join(f.strip().split('\n')[-1] for f in game['failures']))
+        else:
+            print(f'[ {Colors.GREEN}PASS{Colors.END} ]  game {game["index"]}')
+    print(f'\n{Colors.YELLOW}{report["passed"]}{Colors.END} of '
+        + f'{Colors.YELLOW}{report["total"]}{Colors.END} games passed '
+        + f'({report["seconds"]:.2f}s)')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='End-to-end tests for tictactoe')
+    parser.add_argument('--headless', action='store_true',
+                        help='run every game without prompts and print a summary')
+    parser.add_argument('--script', default='tictactoe',
+                        help='module name or path to the .py file to test')
+    parser.add_argument('--tier', type=int, choices=(1, 2, 3), default=3)
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='worker processes (default: one per core)')
+    parser.add_argument('--timeout', type=float, default=5.0,
+                        help='seconds allowed per game')
+    parser.add_argument('--json', dest='json_path', help='write a JSON report')
+    parser.add_argument('--junit', dest='junit_path', help='write a JUnit XML report')
+    return parser.parse_args()
+
+
 if __name__ == '__main__':
+    args = parse_args()
+    if args.headless:
+        report = run_headless(args.script, args.tier - 1, args.jobs, args.timeout,
+                              args.json_path, args.junit_path)
+        print_report(report)
+        sys.exit(0 if report['passed'] == report['total'] else 1)
     run_tests()
     print(f'\n\n{Colors.PURPLE}All tests complete.{Colors.END}')
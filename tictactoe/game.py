@@ -0,0 +1,311 @@
+##########################################
+# GAME STATE AND GAME LOOP               #
+##########################################
+# Tracks a game as moves are applied instead of rescanning the board, and
+# runs the play_game loop on top of it. Moves can be taken back with
+# GameState.undo, so search code can walk a single state up and down the
+# tree instead of copying boards.
+#
+# Every run of k cells that could win (a "line") gets an occupancy counter
+# per player; applying a move bumps the counters of the lines through that
+# cell, so winner and draw detection cost O(1) per line touched and the
+# end of the game comes from the move counter.
+#
+# For 3x3 the lines come out in the same order as bitboard.LINES: rows,
+# columns, diagonal 0, diagonal 1.
+
+import inspect
+import random
+import time
+
+import metrics
+import mnk
+import providers
+import render
+
+# Rules -> (lines, cell_lines), shared by every state with the same rules
+_geometry = {}
+
+
+def geometry(rules):
+    # lines: tuple of cell-index tuples, one per winning run of k cells
+    # cell_lines: for each cell index, the indexes of the lines through it
+    if rules in _geometry:
+        return _geometry[rules]
+    m, n, k = rules
+    lines = []
+    for dr, dc in mnk.DIRECTIONS:
+        for r in range(m):
+            for c in range(n):
+                end_r, end_c = r + dr * (k - 1), c + dc * (k - 1)
+                if 0 <= end_r < m and 0 <= end_c < n:
+                    lines.append(tuple((r + dr * i) * n + c + dc * i
+                                       for i in range(k)))
+    cell_lines = [[] for _ in range(m * n)]
+    for i, line in enumerate(lines):
+        for cell in line:
+            cell_lines[cell].append(i)
+    _geometry[rules] = (tuple(lines), tuple(tuple(l) for l in cell_lines))
+    return _geometry[rules]
+
+
+# Rules -> (line_masks, cell_masks), the geometry as bitmasks
+_masks = {}
+
+
+def line_masks(rules):
+    # line_masks: each line of geometry(rules) as a bitmask over the m*n
+    # cells (bit row * n + col); cell_masks: for each cell, the masks of
+    # the lines through it
+    if rules not in _masks:
+        lines, cell_lines = geometry(rules)
+        masks = tuple(sum(1 << c for c in line) for line in lines)
+        _masks[rules] = (masks, tuple(tuple(masks[i] for i in ls) for ls in cell_lines))
+    return _masks[rules]
+
+
+def completes_line(cell_masks, bits, cell):
+    # whether a player owning bits has a line through cell
+    for mask in cell_masks[cell]:
+        if bits & mask == mask:
+            return True
+    return False
+
+
+def board_bits(board):
+    # (x, o) bitboards of a list-of-lists board of any size
+    x = o = 0
+    n = len(board[0])
+    for r, row in enumerate(board):
+        for c, v in enumerate(row):
+            if v == 'X':
+                x |= 1 << (r * n + c)
+            elif v == 'O':
+                o |= 1 << (r * n + c)
+    return x, o
+
+
+# Rules -> Zobrist keys, fixed per rules so hashes agree across processes
+_zobrist = {}
+
+
+def zobrist(rules):
+    # (keys, side_key, move_keys). keys is {'X': key per cell, 'O': key per
+    # cell} and side_key is xor-ed in while O is to move; a position's hash
+    # is the xor of the keys of its marks and of the side key. A move adds
+    # a mark and passes the turn, so move_keys holds each cell key already
+    # xor-ed with side_key and apply/undo cost a single xor
+    if rules not in _zobrist:
+        rng = random.Random(f'zobrist {rules.m},{rules.n},{rules.k}')
+        cells = rules.m * rules.n
+        keys = {p: tuple(rng.getrandbits(64) for _ in range(cells)) for p in 'XO'}
+        side_key = rng.getrandbits(64)
+        move_keys = {p: tuple(key ^ side_key for key in keys[p]) for p in 'XO'}
+        _zobrist[rules] = (keys, side_key, move_keys)
+    return _zobrist[rules]
+
+
+def position_hash(board, player, rules=None):
+    # Zobrist hash of a list-of-lists board with player to move, equal to
+    # GameState.hash for the same position
+    rules = rules or mnk.rules_for(board)
+    keys, side_key, _ = zobrist(rules)
+    h = side_key if player == 'O' else 0
+    for r, row in enumerate(board):
+        for c, v in enumerate(row):
+            if v != mnk.EMPTY:
+                h ^= keys[v][r * rules.n + c]
+    return h
+
+
+class GameState:
+    """ One game in progress, with O(1) apply and undo """
+
+    def __init__(self, rules=mnk.TICTACTOE, starting_player='X'):
+        self.rules = rules
+        self.lines, self.cell_lines = geometry(rules)
+        self.board = mnk.new_board(rules)
+        self.counts = {'X': [0] * len(self.lines), 'O': [0] * len(self.lines)}
+        self.bits = {'X': 0, 'O': 0}  # bit row * n + col per player
+        self.starting_player = starting_player
+        self.player = starting_player
+        self.move_count = 0
+        self.history = []
+        self.winner = None
+        self.winning_line = -1
+        _, side_key, self.move_keys = zobrist(rules)
+        self.hash = side_key if starting_player == 'O' else 0
+
+    def is_full(self):
+        return self.move_count == self.rules.m * self.rules.n
+
+    def is_over(self):
+        return self.winner is not None or self.is_full()
+
+    def legal_moves(self):
+        # empty cells as a mnk.MoveMask; iterate it for (row, col) moves
+        taken = self.bits['X'] | self.bits['O']
+        return mnk.MoveMask(((1 << self.rules.m * self.rules.n) - 1) & ~taken, self.rules.n)
+
+    def apply(self, move):
+        # places the current player's mark at move and passes the turn.
+        # The move must be legal (see mnk.move_is_valid) and the game not
+        # over yet
+        row, col = move
+        player = self.player
+        cell = row * self.rules.n + col
+        self.board[row][col] = player
+        self.bits[player] |= 1 << cell
+        self.hash ^= self.move_keys[player][cell]
+        self.move_count += 1
+        self.history.append((row, col))
+        counts = self.counts[player]
+        k = self.rules.k
+        for i in self.cell_lines[cell]:
+            counts[i] += 1
+            if counts[i] == k and self.winner is None:
+                self.winner, self.winning_line = player, i
+        self.player = 'O' if player == 'X' else 'X'
+
+    play = apply
+
+    def undo(self):
+        # takes back the last move and returns it. Only that move can have
+        # ended the game, so the result simply goes back to undecided
+        row, col = self.history.pop()
+        player = 'O' if self.player == 'X' else 'X'
+        cell = row * self.rules.n + col
+        self.board[row][col] = mnk.EMPTY
+        self.bits[player] &= ~(1 << cell)
+        self.hash ^= self.move_keys[player][cell]
+        self.move_count -= 1
+        counts = self.counts[player]
+        for i in self.cell_lines[cell]:
+            counts[i] -= 1
+        self.winner, self.winning_line = None, -1
+        self.player = player
+        return row, col
+
+    def rewind(self, index):
+        # undoes moves until only the first index are left; returns the
+        # moves taken back, oldest first
+        taken = []
+        while self.move_count > index:
+            taken.append(self.undo())
+        taken.reverse()
+        return taken
+
+    def replay(self, index=None):
+        # a new GameState with the first index moves of this one (all of
+        # them by default) played from the same start
+        state = GameState(self.rules, self.starting_player)
+        for move in self.history[:index]:
+            state.apply(move)
+        return state
+
+
+def _apply(state, move, timed, t):
+    # validates and plays move; returns the new lap start when timed
+    if mnk.move_is_valid(state.board, move):
+        if timed: t = metrics.lap('validation', t)
+        state.play((int(move[0]), int(move[1])))
+        if timed: t = metrics.lap('win_detection', t)
+    elif timed:
+        metrics.count_invalid()
+        t = metrics.lap('validation', t)
+    return t
+
+
+def _check_rejected(state, provider, move, count, rejected):
+    # rejected moves in a row for the provider that just played, raising
+    # once a provider other than a move list reaches MAX_REJECTED
+    if state.move_count != count or providers.is_scripted(provider):
+        return 0
+    rejected += 1
+    if rejected >= providers.MAX_REJECTED:
+        raise ValueError(f'move provider for {state.player} returned {rejected} '
+                         f'illegal moves in a row (last {move!r})')
+    return rejected
+
+
+def _finish(state, out, timed=False, t=0.0):
+    out.board(state.board)
+    out.text(state.winner or "No winner")
+    out.close()
+    if timed:
+        metrics.lap('rendering', t)
+        metrics.observe_game(state)
+    return state
+
+
+def run_game(rules=mnk.TICTACTOE, moves=None, starting_player='X', echo=None,
+             state=None):
+    # Plays one game and returns the final GameState (state, if given: a
+    # fresh GameState to play on). moves is anything
+    # providers.resolve accepts: None (stdin), a move list or iterator, a
+    # callable, or a dict with one of those per player. An illegal move
+    # from a move list is skipped; any other provider is asked again, up to
+    # providers.MAX_REJECTED times in a row (then ValueError). echo draws
+    # the board each turn: True uses render.default, or pass a renderer. By
+    # default it is on only when a human is playing, so bot and replay
+    # games do no I/O at all
+    players = providers.resolve(moves)
+    if echo is None:
+        echo = providers.human in players.values()
+    out = render.resolve(echo)
+    if state is None:
+        state = GameState(rules, starting_player)
+    # with metrics off this costs one local test per phase
+    timed = metrics.enabled
+    t = time.perf_counter() if timed else 0.0
+    rejected = 0
+    while not state.is_over():
+        out.board(state.board)
+        if timed: t = metrics.lap('rendering', t)
+        provider = players[state.player]
+        if providers.is_async(provider):
+            raise TypeError('async move providers need play_game_async')
+        move = provider(state.board, state.player)
+        if timed: t = metrics.lap('input_wait', t)
+        if move is None:
+            break
+        count = state.move_count
+        t = _apply(state, move, timed, t)
+        rejected = _check_rejected(state, provider, move, count, rejected)
+    return _finish(state, out, timed, t)
+
+
+async def run_game_async(rules=mnk.TICTACTOE, moves=None, starting_player='X',
+                         echo=False):
+    # run_game for async providers (network clients, bots running in an
+    # executor). Plain callables and move lists work here too
+    players = providers.resolve(moves)
+    out = render.resolve(echo)
+    state = GameState(rules, starting_player)
+    timed = metrics.enabled
+    t = time.perf_counter() if timed else 0.0
+    rejected = 0
+    while not state.is_over():
+        out.board(state.board)
+        if timed: t = metrics.lap('rendering', t)
+        provider = players[state.player]
+        move = provider(state.board, state.player)
+        if inspect.isawaitable(move):
+            move = await move
+        if timed: t = metrics.lap('input_wait', t)
+        if move is None:
+            break
+        count = state.move_count
+        t = _apply(state, move, timed, t)
+        rejected = _check_rejected(state, provider, move, count, rejected)
+    return _finish(state, out, timed, t)
+
+
+def play_game(rules=mnk.TICTACTOE, moves=None, starting_player='X', echo=None):
+    # Same contract as main.play_game on any m,n,k board
+    return run_game(rules, moves, starting_player, echo).winner
+
+
+async def play_game_async(rules=mnk.TICTACTOE, moves=None, starting_player='X',
+                          echo=False):
+    return (await run_game_async(rules, moves, starting_player, echo)).winner
@@ -0,0 +1,40 @@
+##########################################
+# HARNESS HELPERS                        #
+##########################################
+# What the test harnesses (e2e_tests-1.py, unit_tests-3.py) and verify.py
+# share: loading the script under test, and the exception a SIGALRM timer
+# raises to stop a call that runs too long.
+
+from importlib import import_module
+import importlib.util
+import os
+import sys
+
+
+class CallTimeout(BaseException):
+    # BaseException so a bare "except Exception" in the script can't eat it
+    pass
+
+
+def raise_timeout(signum, frame):
+    # SIGALRM handler
+    raise CallTimeout()
+
+
+_loaded = {}
+
+
+def load_script(script):
+    # a module name ("tictactoe", "main") or a path to a .py file, which is
+    # loaded as module "tictactoe"; each script is loaded once per process
+    if script not in _loaded:
+        if script.endswith('.py'):
+            path = os.path.abspath(script)
+            sys.path.insert(0, os.path.dirname(path))
+            spec = importlib.util.spec_from_file_location('tictactoe', path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        else:
+            module = import_module(script)
+        _loaded[script] = module
+    return _loaded[script]
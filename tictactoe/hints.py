@@ -0,0 +1,72 @@
+##########################################
+# MOVE HINTS                             #
+##########################################
+# Every legal move of a 3x3 position ranked by how it scores for the
+# player making it: value (1 win, 0 draw, -1 loss with perfect play from
+# then on) and dte, the plies until the game ends. Wins come first, the
+# quickest first; losses last, the slowest first.
+#
+# Values come from the tablebase (tablebase.py), so nothing is searched.
+# Evaluations are cached per canonical position (bitboard.canonical): the
+# 8 symmetric versions of a position share one entry. The oriented answer
+# is also memoized per raw position, which is a bounded set on 3x3, so a
+# repeated hint costs one board conversion and one dict lookup.
+
+from collections import namedtuple
+
+import bitboard
+import tablebase
+
+Hint = namedtuple('Hint', ['move', 'value', 'dte'])
+
+# (canonical key, player) -> ((cell, value, dte), ...) in canonical
+# orientation
+_evaluations = {}
+# (x, o, player) -> tuple of Hints
+_answers = {}
+
+# _CELL_MAPS[sym][c]: the cell that canonical cell c is on the board the
+# position came from
+_CELL_MAPS = [[(inverse[1 << c]).bit_length() - 1 for c in range(bitboard.CELLS)]
+              for inverse in bitboard.INVERSES]
+
+
+def _evaluate(x, o, player):
+    # (cell, value, dte) for every legal move of player
+    tb = tablebase.load()
+    other = 'O' if player == 'X' else 'X'
+    evaluations = []
+    for c in bitboard.iter_cells(bitboard.legal_mask(x, o)):
+        b = 1 << c
+        i = tablebase.index(x | b, o, other) if player == 'X' else tablebase.index(x, o | b, other)
+        # the opponent's result after the move, seen from our side
+        value, dte = -tb.values[i], tb.dtes[i] + 1
+        evaluations.append((c, value, dte))
+    return tuple(evaluations)
+
+
+def hint(board, player):
+    # tuple of Hint(move, value, dte) for player on board, best first; empty
+    # when the game is over or player can't be the one to move
+    if len(board) != bitboard.SIZE or len(board[0]) != bitboard.SIZE:
+        raise ValueError('hints are only available on 3x3 boards')
+    x, o = bitboard.from_board(board)
+    answer = _answers.get((x, o, player))
+    if answer is not None:
+        return answer
+    entry = tablebase.load().probe(board, player)
+    if entry is None or entry[1] == 0:
+        answer = ()
+    else:
+        key, sym = bitboard.canonical(x, o)
+        evaluations = _evaluations.get((key, player))
+        if evaluations is None:
+            evaluations = _evaluate(key & bitboard.FULL, key >> bitboard.CELLS, player)
+            _evaluations[(key, player)] = evaluations
+        cells = _CELL_MAPS[sym]
+        answer = tuple(sorted(
+            (Hint(divmod(cells[c], bitboard.SIZE), value, dte)
+             for c, value, dte in evaluations),
+            key=lambda h: (-tablebase.rank(h.value, h.dte), h.move)))
+    _answers[(x, o, player)] = answer
+    return answer
@@ -1,4 +1,10 @@
-import re
+import sys
+
+import bitboard
+import game
+import hints
+import mnk
+import render
 
 # THIS ONE HAS THE move_is_valid function
 board = [['-', '-', '-'],
@@ -6,125 +12,106 @@ board = [['-', '-', '-'],
          ['-', '-', '-']]
 
 
-def play_game(moves=[], starting_player='X'):
-       #adds the tuple to a list called moves and starts with x
-    board = [['-', '-', '-'],
-         ['-', '-', '-'],
-         ['-', '-', '-']]
-    current_player = starting_player
-    while not get_winner(board) and len(moves) < 9:   #checks for winner or max moves
-        print_board(board)
-        move = get_next_move(current_player)
-        board[move[0]][move[1]] = current_player  #adds to board
-        moves.append(move)   #appends to moves list
-        current_player = 'O' if current_player == 'X' else 'X'
-
-
-    print_board(board)   #checks for winner
-    winner = get_winner(board)
-    if winner:
-        print(winner)
-    else:
-        print("No winner")
-    return winner
+def play_game(moves=None, starting_player='X'):
+    # moves drives the game (see providers.py): None asks on stdin, a list of
+    # (row, col) is replayed in turn order with illegal entries skipped, a
+    # callable provider(board, player) plays both sides, and a dict like
+    # {'O': solver.solver_move} sets one provider per player. The board is
+    # printed every turn; use game.play_game for headless or other-size games.
+    # While the game runs, board is the live game board, so get_next_move
+    # checks moves against the position actually being played
+    global board
+    state = game.GameState(mnk.TICTACTOE, starting_player)
+    board, outer = state.board, board
+    try:
+        return game.run_game(mnk.TICTACTOE, moves, starting_player, echo=True,
+                             state=state).winner
+    finally:
+        board = outer
 
 
 
 
 def print_board(board):
-    for row in board:    #just prints the board
-        print('|'.join(row))
+    # one write for the whole board (see render.py for the other renderers)
+    sys.stdout.write(render.format_board(board))
 
 
 
 
 def get_next_move(player):
-    valid_move = False
-    while not valid_move:
-        move = input(f'Next move (row,col) for {player}: ')
-        if not input_str_is_valid(move):
-            print("Could not parse move")
-            continue
-        move = move.strip('()').split(',')
-        row, col = int(move[0]), int(move[1])
-        if not move_is_valid(board, move):  #check the automated version and the input version, inside get_next_move and outside
-            print('Invalid move')
-            continue
-        else:
-            valid_move = True
-    return (row, col)
+    # parsing, range and occupancy checks all happen in one pass; see
+    # moveparse for the accepted notations
+    return mnk.get_next_move(board, player)
+
+
+def hint(board, player):
+    # every legal move for player ranked best first, as Hint(move, value,
+    # dte): value 1/0/-1 is a win/draw/loss with perfect play and dte the
+    # plies left in the game. Served from caches, no search
+    return hints.hint(board, player)
 
 
 def move_is_valid(board, move):
-     valid_move =False
      row, col = int(move[0]), int(move[1])
-     print(board[row][col])
 
-     if row >= 0 and row <= 2 and col >= 0 and col <= 2 and board[row][col] == '-':
-         return True
-     else:
+     # bounds first, so an off-board move never indexes the board
+     if row < 0 or row >= len(board) or col < 0 or col >= len(board[0]):
          return False
+     return board[row][col] == '-'
+
+def legal_moves(board):
+    # the empty cells of board as a bitmask (bit row * 3 + col) that also
+    # iterates as (row, col) moves
+    if not is_3x3(board):
+        return mnk.legal_moves(board)
+    return mnk.MoveMask(bitboard.legal_mask(*bitboard.from_board(board)), bitboard.SIZE)
 
 def input_str_is_valid(move_str):
-    pattern = re.compile("^[(]?(\s*[0-9]\s*,\s*[0-9]\s*)[)]?$")
+    # any number of digits per coordinate, for boards bigger than 3x3
+    return mnk.input_str_is_valid(move_str)
 
-    if re.match(pattern,move_str):
-        return True
-    else:
-        return False
+# The winner functions are thin adapters over the bitboard engine: the board
+# is converted once and the first completed line is a table lookup. They
+# only take 3x3 boards, since the board alone does not say how many in a
+# row win; use mnk.get_winner(board, k) and friends for other sizes
+
+def is_3x3(board):
+    return len(board) == 3 and len(board[0]) == 3
 
 def get_winner(board):
-    for player in ['X', 'O']:         #checks if any of the winning conditions are true
-        if get_winner_rows(board):
-           return get_winner_rows(board)
-        elif get_winner_cols(board):
-            return get_winner_cols(board)
-        elif get_winner_diag(board):
-            return get_winner_diag(board)
-    return None
+    if not is_3x3(board):
+        raise ValueError('get_winner takes a 3x3 board; use mnk.get_winner(board, k)')
+    x, o = bitboard.from_board(board)
+    return bitboard.winner(x, o)
 
 
 
 def get_winner_rows(board):
-    for i in range(3):
-        if board[i][0] == board[i][1] and board[i][1] == board [i][2] and not board[i][0] == '-':
-            if board[i][0] == 'X':
-                return 'X'
-            else:
-                return 'O'
-    return None
-
-
-
+    if not is_3x3(board):
+        raise ValueError('get_winner_rows takes a 3x3 board; use mnk.get_winner_rows(board, k)')
+    x, o = bitboard.from_board(board)
+    return bitboard.winner(x, o, bitboard.FIRST_ROW)
 
 
 
 def get_winner_cols(board):
-    for i in range(3):
-        if board[0][i] == board [1][i] and board [1][i] == board [2][i] and not board[0][i] == '-':
-            if board[0][i] == 'X':
-                return 'X'
-            else:
-                return 'O'
-    return None
-
-
-
+    if not is_3x3(board):
+        raise ValueError('get_winner_cols takes a 3x3 board; use mnk.get_winner_cols(board, k)')
+    x, o = bitboard.from_board(board)
+    return bitboard.winner(x, o, bitboard.FIRST_COL)
 
 
 
 def get_winner_diag(board):
-    if board[0][0] == board[1][1] and board[1][1] == board[2][2] and not board[2][2] == '-':
-        if board[0][0] == 'X':
-            return 'X'
-        else:
-            return 'O'
-    elif board[0][2] == board[1][1] and board[1][1] == board[2][0] and not board[1][1] == '-':
-        if board[2][0] == 'X':
-            return 'X'
-        else:
-            return 'O'
-    return None
+    if not is_3x3(board):
+        raise ValueError('get_winner_diag takes a 3x3 board; use mnk.get_winner_diag(board, k)')
+    try:
+        return bitboard.DIAG_WINNER[board[0][0] + board[0][2] + board[1][1]
+                                    + board[2][0] + board[2][2]]
+    except (KeyError, TypeError):
+        x, o = bitboard.from_board(board)
+        return bitboard.winner(x, o, bitboard.FIRST_DIAG)
 
 if __name__ == '__main__':
     play_game()
@@ -0,0 +1,172 @@
+##########################################
+# MONTE CARLO TREE SEARCH PLAYER         #
+##########################################
+# UCT search for any m,n,k board. Positions are a pair of bitboards over
+# the m*n cells (bit row*n + col) and random rollouts check wins only
+# against the lines through the cell just played, so a playout costs
+# O(cells * lines per cell) integer operations.
+#
+# MCTSPlayer is a move provider: pass it to play_game wherever
+# get_next_move would supply moves. Its search tree is kept between calls
+# and re-rooted at the position the opponent's reply leads to. Give it a
+# wall-clock budget (time_limit, seconds), a playout budget (playouts) or
+# both; last_stats reports what the last move cost.
+
+import math
+import random
+import time
+
+import game
+import mnk
+
+X, O, DRAW = 0, 1, 2
+
+
+class Node:
+    __slots__ = ('move', 'parent', 'children', 'untried', 'visits', 'wins',
+                 'mover', 'x', 'o', 'result')
+
+    def __init__(self, move, parent, mover, x, o, result, untried):
+        self.move = move        # cell played to reach this node
+        self.parent = parent
+        self.children = []
+        self.untried = untried  # cells not expanded yet
+        self.visits = 0
+        self.wins = 0.0         # from the point of view of mover
+        self.mover = mover      # X or O, whoever played move
+        self.x = x
+        self.o = o
+        self.result = result    # None while the game goes on, else X/O/DRAW
+
+
+class MCTSPlayer:
+    """ UCT move provider with a time and/or playout budget """
+
+    def __init__(self, rules=mnk.TICTACTOE, time_limit=None, playouts=None,
+                 exploration=1.4, seed=None):
+        if time_limit is None and playouts is None:
+            playouts = 2000
+        self.rules = rules
+        self.time_limit = time_limit
+        self.playouts = playouts
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.cells = rules.m * rules.n
+        self.full = (1 << self.cells) - 1
+        _, self.cell_masks = game.line_masks(rules)
+        self.root = None
+        self.last_stats = {}
+
+    def _empty_cells(self, x, o):
+        taken = x | o
+        return [c for c in range(self.cells) if not taken >> c & 1]
+
+    def _new_node(self, move, parent, mover, x, o):
+        bits = x if mover == X else o
+        if move is not None and game.completes_line(self.cell_masks, bits, move):
+            result = mover
+        elif x | o == self.full:
+            result = DRAW
+        else:
+            result = None
+        untried = [] if result is not None else self._empty_cells(x, o)
+        self.rng.shuffle(untried)
+        return Node(move, parent, mover, x, o, result, untried)
+
+    def _find_root(self, x, o, to_move):
+        # reuses the subtree for (x, o) if the last search reached it: the
+        # old root, our move, or the opponent's reply to it
+        frontier = [self.root] if self.root is not None else []
+        for _ in range(3):
+            for node in frontier:
+                if node.x == x and node.o == o and node.mover != to_move:
+                    node.parent = None
+                    return node, True
+            frontier = [c for n in frontier for c in n.children]
+        return self._new_node(None, None, to_move ^ 1, x, o), False
+
+    def _select(self, node):
+        log_n = math.log(node.visits)
+        c = self.exploration
+        best, best_score = None, -1.0
+        for child in node.children:
+            score = child.wins / child.visits + c * math.sqrt(log_n / child.visits)
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+    def _rollout(self, x, o, to_move):
+        bits = [x, o]
+        empty = self._empty_cells(x, o)
+        self.rng.shuffle(empty)
+        for cell in empty:
+            b = bits[to_move] | (1 << cell)
+            bits[to_move] = b
+            if game.completes_line(self.cell_masks, b, cell):
+                return to_move
+            to_move ^= 1
+        return DRAW
+
+    def _playout(self, root):
+        node = root
+        # selection
+        while not node.untried and node.children:
+            node = self._select(node)
+        # expansion
+        if node.untried:
+            cell = node.untried.pop()
+            mover = node.mover ^ 1
+            if mover == X:
+                child = self._new_node(cell, node, mover, node.x | (1 << cell), node.o)
+            else:
+                child = self._new_node(cell, node, mover, node.x, node.o | (1 << cell))
+            node.children.append(child)
+            node = child
+        # simulation
+        if node.result is not None:
+            result = node.result
+        else:
+            result = self._rollout(node.x, node.o, node.mover ^ 1)
+        # backpropagation
+        while node is not None:
+            node.visits += 1
+            if result == node.mover:
+                node.wins += 1.0
+            elif result == DRAW:
+                node.wins += 0.5
+            node = node.parent
+
+    def search(self, board, player):
+        # runs the search for player on board and returns the root node
+        x, o = game.board_bits(board)
+        to_move = X if player == 'X' else O
+        root, reused = self._find_root(x, o, to_move)
+        self.root = root
+
+        start = time.perf_counter()
+        deadline = None if self.time_limit is None else start + self.time_limit
+        n = 0
+        while root.result is None:
+            if self.playouts is not None and n >= self.playouts:
+                break
+            # checking the clock every playout costs more than a tiny
+            # rollout on small boards
+            if deadline is not None and n % 16 == 0 and time.perf_counter() >= deadline:
+                break
+            self._playout(root)
+            n += 1
+        seconds = time.perf_counter() - start
+        self.last_stats = {
+            'playouts': n,
+            'seconds': seconds,
+            'playouts_per_sec': n / seconds if seconds else 0.0,
+            'reused_visits': root.visits - n if reused else 0,
+        }
+        return root
+
+    def __call__(self, board, player):
+        root = self.search(board, player)
+        if not root.children:
+            return None
+        best = max(root.children, key=lambda c: c.visits)
+        return divmod(best.move, self.rules.n)
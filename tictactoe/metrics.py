@@ -0,0 +1,176 @@
+##########################################
+# INSTRUMENTATION                        #
+##########################################
+# Optional counters and timers for the game loop and the public functions
+# of main.py and mnk.py. Off by default; when off, the game loop pays one
+# local bool test per phase and no function is wrapped at all.
+#
+# Recorded while enabled:
+#   - seconds and count per phase of a turn, timed by the game loop
+#     itself: input_wait (the move provider), validation, win_detection
+#     (applying the move to the GameState) and rendering (printing the
+#     board)
+#   - calls and seconds per wrapped function, keyed "module.function".
+#     These are kept apart from the phases: they overlap them (the loop
+#     calls mnk.move_is_valid during validation, a human's input_wait is
+#     mostly mnk.get_next_move), so adding them in would count time twice
+#   - invalid moves (rejected by the game loop or at the stdin prompt)
+#   - finished games by result and a game-length histogram
+#
+# play_game goes through game.run_game, which calls mnk's functions, not
+# main's: wrap mnk to see the calls a game makes, main to see direct calls
+# to main.py's API.
+#
+#   metrics.enable(main, mnk, callback=print)   # report per game
+#   ...play games...
+#   print(metrics.prometheus_text())
+#   metrics.disable()
+
+import functools
+import time
+
+enabled = False
+
+PHASES = ('input_wait', 'validation', 'win_detection', 'rendering')
+# wrapped in every module passed to enable() that has them
+FUNCTIONS = ('play_game', 'get_next_move', 'move_is_valid', 'get_winner')
+LENGTH_BUCKETS = (1, 2, 3, 4, 5, 6, 7, 8, 9, 16, 25, 49, 100, 225)
+
+_callback = None
+_patched = []  # (module, name, original function)
+
+
+def reset():
+    global calls, function_seconds, phase_seconds, phase_count
+    global invalid_moves, games, length_buckets, length_sum
+    calls = {}             # "module.function" -> calls
+    function_seconds = {}  # "module.function" -> seconds
+    phase_seconds = dict.fromkeys(PHASES, 0.0)
+    phase_count = dict.fromkeys(PHASES, 0)
+    invalid_moves = 0
+    games = {'X': 0, 'O': 0, 'tie': 0, 'incomplete': 0}
+    length_buckets = [0] * (len(LENGTH_BUCKETS) + 1)  # last one is +Inf
+    length_sum = 0
+
+
+reset()
+
+
+##########################################
+# RECORDING                              #
+##########################################
+
+def lap(phase, start):
+    # charges the time since start to phase and returns the new start
+    now = time.perf_counter()
+    phase_seconds[phase] += now - start
+    phase_count[phase] += 1
+    return now
+
+
+def count_invalid(n=1):
+    global invalid_moves
+    invalid_moves += n
+
+
+def observe_game(state):
+    global length_sum
+    if state.winner:
+        games[state.winner] += 1
+    elif state.is_full():
+        games['tie'] += 1
+    else:
+        games['incomplete'] += 1
+    length = state.move_count
+    length_sum += length
+    for i, bound in enumerate(LENGTH_BUCKETS):
+        if length <= bound:
+            length_buckets[i] += 1
+            break
+    else:
+        length_buckets[-1] += 1
+    if _callback is not None:
+        _callback(snapshot())
+
+
+def _wrap(name, f):
+    @functools.wraps(f)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return f(*args, **kwargs)
+        finally:
+            function_seconds[name] = (function_seconds.get(name, 0.0)
+                                      + time.perf_counter() - start)
+            calls[name] = calls.get(name, 0) + 1
+    return wrapper
+
+
+def enable(*modules, callback=None):
+    # turns recording on and wraps the FUNCTIONS found in modules (main,
+    # mnk). callback(snapshot) runs after every finished game
+    global enabled, _callback
+    disable()
+    for module in modules:
+        for name in FUNCTIONS:
+            f = getattr(module, name, None)
+            if f is not None:
+                _patched.append((module, name, f))
+                setattr(module, name, _wrap(f'{module.__name__}.{name}', f))
+    _callback = callback
+    enabled = True
+
+
+def disable():
+    global enabled, _callback
+    while _patched:
+        module, name, f = _patched.pop()
+        setattr(module, name, f)
+    _callback = None
+    enabled = False
+
+
+##########################################
+# EXPORT                                 #
+##########################################
+
+def snapshot():
+    cumulative, buckets = 0, {}
+    for bound, n in zip(LENGTH_BUCKETS + ('+Inf',), length_buckets):
+        cumulative += n
+        buckets[str(bound)] = cumulative
+    return {
+        'calls': dict(calls),
+        'function_seconds': dict(function_seconds),
+        'phase_seconds': dict(phase_seconds),
+        'phase_count': dict(phase_count),
+        'invalid_moves': invalid_moves,
+        'games': dict(games),
+        'game_length': {'buckets': buckets, 'sum': length_sum,
+                        'count': sum(length_buckets)},
+    }
+
+
+def prometheus_text(prefix='tictactoe'):
+    # Prometheus text exposition format
+    s = snapshot()
+    out = [f'# TYPE {prefix}_calls_total counter']
+    out += [f'{prefix}_calls_total{{function="{k}"}} {v}' for k, v in s['calls'].items()]
+    out.append(f'# TYPE {prefix}_function_seconds_total counter')
+    out += [f'{prefix}_function_seconds_total{{function="{k}"}} {v:.9f}'
+            for k, v in s['function_seconds'].items()]
+    out.append(f'# TYPE {prefix}_phase_seconds_total counter')
+    out += [f'{prefix}_phase_seconds_total{{phase="{k}"}} {v:.9f}'
+            for k, v in s['phase_seconds'].items()]
+    out.append(f'# TYPE {prefix}_phase_total counter')
+    out += [f'{prefix}_phase_total{{phase="{k}"}} {v}' for k, v in s['phase_count'].items()]
+    out.append(f'# TYPE {prefix}_invalid_moves_total counter')
+    out.append(f'{prefix}_invalid_moves_total {s["invalid_moves"]}')
+    out.append(f'# TYPE {prefix}_games_total counter')
+    out += [f'{prefix}_games_total{{result="{k}"}} {v}' for k, v in s['games'].items()]
+    out.append(f'# TYPE {prefix}_game_length histogram')
+    out += [f'{prefix}_game_length_bucket{{le="{k}"}} {v}'
+            for k, v in s['game_length']['buckets'].items()]
+    out.append(f'{prefix}_game_length_sum {s["game_length"]["sum"]}')
+    out.append(f'{prefix}_game_length_count {s["game_length"]["count"]}')
+    return '\n'.join(out) + '\n'
@@ -0,0 +1,143 @@
+##########################################
+# GENERALIZED m,n,k GAMES                #
+##########################################
+# m x n boards (m rows, n columns) where k in a row wins: tic-tac-toe is
+# 3,3,3 and gomoku is 15,15,5. Boards are the same list-of-lists of
+# 'X' / 'O' / '-' strings main.py uses.
+#
+# The get_winner_* functions scan the whole board; games in progress are
+# tracked by game.GameState, which only checks the lines through each move.
+
+from collections import namedtuple
+import re
+
+import metrics
+import moveparse
+
+Rules = namedtuple('Rules', ['m', 'n', 'k'])
+TICTACTOE = Rules(3, 3, 3)
+GOMOKU = Rules(15, 15, 5)
+
+EMPTY = '-'
+
+# row, then column, then the two diagonals (down-right and down-left)
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+MOVE_PATTERN = re.compile(r'^[(]?(\s*[0-9]+\s*,\s*[0-9]+\s*)[)]?$')
+
+
+def new_board(rules=TICTACTOE):
+    return [[EMPTY] * rules.n for _ in range(rules.m)]
+
+
+def rules_for(board):
+    # rules for a bare board: k is the shorter side, i.e. a full line wins
+    m, n = len(board), len(board[0])
+    return Rules(m, n, min(m, n))
+
+
+##########################################
+# VALIDATION                             #
+##########################################
+
+def input_str_is_valid(move_str):
+    return MOVE_PATTERN.match(move_str) is not None
+
+
+class MoveMask(int):
+    """ Bitmask of empty cells (bit row * n + col) that iterates as moves """
+
+    def __new__(cls, mask, n):
+        self = super().__new__(cls, mask)
+        self.n = n
+        return self
+
+    def __iter__(self):
+        mask = int(self)
+        while mask:
+            low = mask & -mask
+            yield divmod(low.bit_length() - 1, self.n)
+            mask ^= low
+
+    def __contains__(self, move):
+        row, col = move
+        return 0 <= col < self.n and row >= 0 and bool(self >> (row * self.n + col) & 1)
+
+    def __len__(self):
+        return bin(self).count('1')
+
+
+def legal_moves(board):
+    n = len(board[0])
+    mask = 0
+    for r, row in enumerate(board):
+        for c, v in enumerate(row):
+            if v == EMPTY:
+                mask |= 1 << (r * n + c)
+    return MoveMask(mask, n)
+
+
+def move_is_valid(board, move):
+    row, col = int(move[0]), int(move[1])
+    return (0 <= row < len(board) and 0 <= col < len(board[0])
+            and board[row][col] == EMPTY)
+
+
+def get_next_move(board, player):
+    # asks on stdin until the player types a legal move for board. Any
+    # notation moveparse accepts works
+    rules = (len(board), len(board[0]))
+    while True:
+        move = moveparse.parse_move(input(f'Next move (row,col) for {player}: '), rules)
+        if moveparse.is_error(move) or board[move[0]][move[1]] != EMPTY:
+            if metrics.enabled:
+                metrics.count_invalid()
+            if moveparse.is_error(move) and move.reason == moveparse.SYNTAX:
+                print("Could not parse move")
+            else:
+                print('Invalid move')
+            continue
+        return move
+
+
+##########################################
+# WIN DETECTION                          #
+##########################################
+
+def _scan(board, k, starts, dr, dc):
+    # walks each line from its start cell and returns the owner of the
+    # first run of k equal non-empty cells
+    m, n = len(board), len(board[0])
+    for r, c in starts:
+        run, prev = 0, None
+        while 0 <= r < m and 0 <= c < n:
+            cur = board[r][c]
+            if cur == prev and cur != EMPTY:
+                run += 1
+            else:
+                run, prev = 1, cur
+            if run >= k and cur != EMPTY:
+                return cur
+            r, c = r + dr, c + dc
+    return None
+
+
+def get_winner_rows(board, k):
+    return _scan(board, k, [(r, 0) for r in range(len(board))], 0, 1)
+
+
+def get_winner_cols(board, k):
+    return _scan(board, k, [(0, c) for c in range(len(board[0]))], 1, 0)
+
+
+def get_winner_diag(board, k):
+    m, n = len(board), len(board[0])
+    down_right = [(r, 0) for r in range(m)] + [(0, c) for c in range(1, n)]
+    down_left = [(0, c) for c in range(n)] + [(r, n - 1) for r in range(1, m)]
+    return (_scan(board, k, down_right, 1, 1)
+            or _scan(board, k, down_left, 1, -1))
+
+
+def get_winner(board, k):
+    return (get_winner_rows(board, k) or get_winner_cols(board, k)
+            or get_winner_diag(board, k))
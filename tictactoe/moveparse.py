@@ -0,0 +1,95 @@
+##########################################
+# MOVE PARSING                           #
+##########################################
+# One pass from text to (row, col). parse_move returns either a (row, col)
+# tuple of ints or a MoveError saying why the text was rejected, so callers
+# never have to strip/split/int the string again.
+#
+# Accepted notations:
+#   "1,2"  "(1, 2)"   row,col, 0-based, any number of digits
+#   "b2"   "B2"       column letter (a = leftmost) and 1-based row from the
+#                     top, the same orientation print_board uses
+#   "7"               numpad digit, 3x3 only: 7 8 9 is the top row and
+#                     1 2 3 the bottom row
+#
+# iter_parse, parse_file and parse_move_list handle whole streams (log
+# files, the MOVES field of tests_str) without re-compiling anything.
+
+from collections import namedtuple
+import re
+
+# rules is an mnk.Rules or any (m, n, ...) tuple
+TICTACTOE = (3, 3, 3)
+
+MoveError = namedtuple('MoveError', ['text', 'reason'])
+SYNTAX = 'could not parse move'
+OUT_OF_RANGE = 'move is off the board'
+
+MOVE_RE = re.compile(r'''
+    ^\s*(?:
+        \(?\s*(?P<row>[0-9]+)\s*,\s*(?P<col>[0-9]+)\s*\)?
+      | (?P<letter>[a-zA-Z])\s*(?P<number>[0-9]+)
+      | (?P<pad>[1-9])
+    )\s*$''', re.VERBOSE)
+
+# numpad digit -> (row, col) on a 3x3 board
+NUMPAD = {str(7 - 3 * r + c): (r, c) for r in range(3) for c in range(3)}
+
+
+def parse_move(text, rules=TICTACTOE):
+    m = MOVE_RE.match(text)
+    if m is None:
+        return MoveError(text, SYNTAX)
+    row = m.group('row')
+    if row is not None:
+        move = (int(row), int(m.group('col')))
+    elif m.group('letter') is not None:
+        move = (int(m.group('number')) - 1,
+                ord(m.group('letter').lower()) - ord('a'))
+    elif rules[0] == 3 and rules[1] == 3:
+        move = NUMPAD[m.group('pad')]
+    else:
+        return MoveError(text, SYNTAX)
+    if 0 <= move[0] < rules[0] and 0 <= move[1] < rules[1]:
+        return move
+    return MoveError(text, OUT_OF_RANGE)
+
+
+def is_error(result):
+    return isinstance(result, MoveError)
+
+
+def iter_parse(lines, rules=TICTACTOE):
+    # parses every string in lines, yielding a move or MoveError for each
+    match = MOVE_RE.match
+    m_rows, n_cols = rules[0], rules[1]
+    for text in lines:
+        m = match(text)
+        # plain row,col is by far the most common form in logs, so it gets
+        # its own path
+        if m is not None and m.group('row') is not None:
+            move = (int(m.group('row')), int(m.group('col')))
+            if move[0] < m_rows and move[1] < n_cols:
+                yield move
+            else:
+                yield MoveError(text, OUT_OF_RANGE)
+        else:
+            yield parse_move(text, rules)
+
+
+def parse_file(f, rules=TICTACTOE):
+    # streams a file (path or open text file) with one move per line; blank
+    # lines and lines starting with '#' are skipped
+    if isinstance(f, str):
+        with open(f) as fh:
+            yield from parse_file(fh, rules)
+        return
+    yield from iter_parse((line for line in f
+                           if line.strip() and not line.lstrip().startswith('#')),
+                          rules)
+
+
+def parse_move_list(text, rules=TICTACTOE, sep=';'):
+    # "1,1;0,0;2,2" -> [(1, 1), (0, 0), (2, 2)], MoveErrors in place of bad
+    # entries
+    return list(iter_parse(text.split(sep), rules))
@@ -0,0 +1,117 @@
+##########################################
+# PRECOMPUTED POSITION TABLE             #
+##########################################
+# Every position reachable through play_game with X moving first (5478 of
+# them, counting the empty board), reduced to 765 canonical forms under the
+# 8 symmetries of the board. The table is read off solver.py's results on
+# import and is stored in flat arrays indexed by slot:
+#
+#   KEYS[slot]    canonical key, x | (o << 9), sorted
+#   VALUES[slot]  solver score for the player to move (see solver.py)
+#   BEST[slot]    mask of optimal moves, in canonical orientation
+#   WINNER[slot]  IN_PROGRESS, X_WINS, O_WINS or TIE
+#
+# Raw positions map straight to (slot, symmetry) through a dict, so a
+# lookup never has to canonicalize.
+
+from array import array
+
+import bitboard
+import solver
+
+IN_PROGRESS = 0
+X_WINS = 1
+O_WINS = 2
+TIE = 3
+WINNER_NAMES = (None, 'X', 'O', None)
+
+# symmetry tables live with the bitboard engine
+SYMMETRIES, INVERSES = bitboard.SYMMETRIES, bitboard.INVERSES
+canonical = bitboard.canonical
+
+
+def _status(x, o):
+    w = bitboard.winner(x, o)
+    if w == 'X':
+        return X_WINS
+    if w == 'O':
+        return O_WINS
+    if bitboard.is_full(x, o):
+        return TIE
+    return IN_PROGRESS
+
+
+def _sides(x, o):
+    # (x, o) -> (me, opp) for whoever moves next, X moving first; the swap
+    # is its own inverse, so it also turns solver keys back into (x, o)
+    if bin(x).count('1') == bin(o).count('1'):
+        return x, o
+    return o, x
+
+
+def _build_table():
+    # The solver has already walked every position reachable from the
+    # empty board (it keys them by side to move), so the table is read off
+    # its results instead of walking the game again
+    solver.solve()
+    canon = {}
+    for key in solver._table:
+        me, opp = key & bitboard.FULL, key >> bitboard.CELLS
+        x, o = _sides(me, opp)
+        canon[x | (o << bitboard.CELLS)] = canonical(x, o)
+
+    keys = array('l', sorted({k for k, _ in canon.values()}))
+    slots = {k: i for i, k in enumerate(keys)}
+    values = array('b', bytes(len(keys)))
+    best = array('H', [0] * len(keys))
+    winner = array('B', bytes(len(keys)))
+    for i, key in enumerate(keys):
+        x, o = key & bitboard.FULL, key >> bitboard.CELLS
+        values[i], best[i] = solver._table[solver._key(*_sides(x, o))]
+        winner[i] = _status(x, o)
+
+    index = {key: (slots[k] << 3) | s for key, (k, s) in canon.items()}
+    return keys, values, best, winner, index
+
+
+KEYS, VALUES, BEST, WINNER, _index = _build_table()
+
+
+##########################################
+# LOOKUPS                                #
+##########################################
+
+def lookup(x, o):
+    # returns (value, best_mask, status) with best_mask in the orientation
+    # of (x, o), or None when the position can't come up in play_game
+    entry = _index.get(x | (o << bitboard.CELLS))
+    if entry is None:
+        return None
+    slot, sym = entry >> 3, entry & 7
+    return VALUES[slot], INVERSES[sym][BEST[slot]], WINNER[slot]
+
+
+def winner(x, o):
+    # 'X', 'O' or None, straight from the table; positions outside the table
+    # fall back to the bitboard engine
+    entry = _index.get(x | (o << bitboard.CELLS))
+    if entry is None:
+        return bitboard.winner(x, o)
+    return WINNER_NAMES[WINNER[entry >> 3]]
+
+
+def position_winner(board):
+    return winner(*bitboard.from_board(board))
+
+
+def table_move(board, player):
+    # move provider for play_game backed by the table. Positions outside it
+    # (games started by O, hand-built boards) are answered by the solver
+    x, o = bitboard.from_board(board)
+    entry = lookup(x, o)
+    if entry is None or (player == 'X') != (bin(x).count('1') == bin(o).count('1')):
+        return solver.solver_move(board, player)
+    best = entry[1]
+    if not best:
+        return None
+    return divmod((best & -best).bit_length() - 1, bitboard.SIZE)
@@ -0,0 +1,67 @@
+##########################################
+# MOVE PROVIDERS                         #
+##########################################
+# A move provider is anything that can answer "what does player play on
+# this board":
+#   - a callable provider(board, player) returning (row, col), or None
+#     when it has no more moves (the game then stops unfinished)
+#   - a list, tuple or iterator of pre-recorded (row, col) moves, shared
+#     by both players in turn order
+#   - an async function provider(board, player); only the async game loop
+#     (game.play_game_async) can await it
+#   - None, meaning a human typing on stdin
+#
+# Moves are checked against the live board by the game loop. A pre-recorded
+# list moves on to its next entry after an illegal move; any other provider
+# is asked again, and after MAX_REJECTED illegal moves in a row the game
+# loop gives up on it with ValueError.
+
+import inspect
+
+import mnk
+
+MAX_REJECTED = 3
+
+
+def human(board, player):
+    return mnk.get_next_move(board, player)
+
+
+def scripted(moves):
+    # provider replaying moves in order, then None
+    it = iter(moves)
+
+    def provider(board, player):
+        return next(it, None)
+    provider.scripted = True
+    return provider
+
+
+def as_provider(obj):
+    if obj is None:
+        return human
+    if callable(obj):
+        return obj
+    try:
+        return scripted(obj)
+    except TypeError:
+        raise TypeError(f'not a move provider: {obj!r}') from None
+
+
+def is_async(provider):
+    return inspect.iscoroutinefunction(provider)
+
+
+def is_scripted(provider):
+    # True for providers replaying a pre-recorded move list
+    return getattr(provider, 'scripted', False)
+
+
+def resolve(moves):
+    # turns play_game's moves argument into {'X': provider, 'O': provider}.
+    # A dict gives one provider per player; anything else is shared, so a
+    # move list is consumed by both players in turn
+    if isinstance(moves, dict):
+        return {p: as_provider(moves.get(p)) for p in ('X', 'O')}
+    shared = as_provider(moves)
+    return {'X': shared, 'O': shared}
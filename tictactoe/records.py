@@ -0,0 +1,215 @@
+##########################################
+# BINARY GAME RECORDS                    #
+##########################################
+# A finished (or abandoned) 3x3 game packed into one 64-bit word:
+#
+#   bits  0-35   moves, 4 bits each, move i at bit 4*i, as cell index
+#                row*3 + col (see bitboard.py)
+#   bits 36-39   number of moves (0-9)
+#   bits 40-41   result: 0 incomplete, 1 X won, 2 O won, 3 tie
+#   bits 42-45   winning line, index into bitboard.LINES, 15 for none
+#   bit  46      starting player: 0 X, 1 O
+#
+# A record file is an 8-byte header (MAGIC) followed by little-endian
+# words. RecordWriter writes one, iter_records streams it and RecordFile
+# memory-maps it for random access. from_text/to_text convert to and from
+# the line format of tests_str in e2e_tests-1.py:
+#
+#   winner,num_valid_moves,method=r,c;r,c;...
+
+from array import array
+from collections import namedtuple
+import mmap
+import sys
+
+import bitboard
+import moveparse
+
+MAGIC = b'TTTREC\x00\x01'
+WORD = 8
+
+RESULTS = ('I', 'X', 'O', 'T')
+LINE_NAMES = ('r0', 'r1', 'r2', 'c0', 'c1', 'c2', 'd0', 'd1')
+NO_LINE = 15
+
+# winner is one of RESULTS, line is one of LINE_NAMES or '-'
+GameRecord = namedtuple('GameRecord', ['winner', 'moves', 'line', 'starting_player'])
+
+
+def encode(record):
+    word = 0
+    for i, (r, c) in enumerate(record.moves):
+        word |= bitboard.cell(r, c) << (4 * i)
+    word |= len(record.moves) << 36
+    word |= RESULTS.index(record.winner) << 40
+    line = NO_LINE if record.line == '-' else LINE_NAMES.index(record.line)
+    word |= line << 42
+    word |= (record.starting_player == 'O') << 46
+    return word
+
+
+def decode(word):
+    n = (word >> 36) & 0xF
+    moves = [divmod((word >> (4 * i)) & 0xF, bitboard.SIZE) for i in range(n)]
+    line = (word >> 42) & 0xF
+    return GameRecord(RESULTS[(word >> 40) & 0x3], moves,
+                      '-' if line == NO_LINE else LINE_NAMES[line],
+                      'O' if word >> 46 & 1 else 'X')
+
+
+##########################################
+# TEXT FORMAT                            #
+##########################################
+
+def from_text(line, starting_player='X'):
+    # Parses one tests_str line. Moves that would be rejected in play (off
+    # the board or on a taken cell) are dropped, so the record holds only
+    # the num_valid_moves moves that were actually played
+    results, moves = line.strip().split('=')
+    winner, _, method = results.split(',')
+    taken = 0
+    played = []
+    for move in moveparse.parse_move_list(moves):
+        if moveparse.is_error(move):
+            continue
+        b = bitboard.bit(*move)
+        if not taken & b:
+            taken |= b
+            played.append(move)
+    return GameRecord(winner, played, method, starting_player)
+
+
+def to_text(record):
+    moves = ';'.join(f'{r},{c}' for r, c in record.moves)
+    return f'{record.winner},{len(record.moves)},{record.line}={moves}'
+
+
+def iter_text(lines, starting_player='X'):
+    # records from tests_str-style lines, skipping blanks and comments
+    for line in lines:
+        line = line.strip()
+        if line and line[0] != '#':
+            yield from_text(line, starting_player)
+
+
+##########################################
+# FILES                                  #
+##########################################
+
+def _words(buf):
+    words = array('Q')
+    words.frombytes(buf)
+    if sys.byteorder == 'big':
+        words.byteswap()
+    return words
+
+
+class RecordWriter:
+    """ Buffered writer of record files """
+
+    def __init__(self, f, buffer_words=65536):
+        self.f = f
+        self.buffer = array('Q')
+        self.buffer_words = buffer_words
+        f.write(MAGIC)
+
+    def write_word(self, word):
+        self.buffer.append(word)
+        if len(self.buffer) >= self.buffer_words:
+            self.flush()
+
+    def write(self, record):
+        self.write_word(encode(record))
+
+    def flush(self):
+        if sys.byteorder == 'big':
+            self.buffer.byteswap()
+        self.f.write(self.buffer.tobytes())
+        self.buffer = array('Q')
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _check_header(header):
+    if header != MAGIC:
+        raise ValueError('not a game record file')
+
+
+def iter_words(f, chunk_words=65536):
+    # streams the raw words of an open binary record file
+    _check_header(f.read(len(MAGIC)))
+    while True:
+        buf = f.read(chunk_words * WORD)
+        if not buf:
+            return
+        if len(buf) % WORD:
+            raise ValueError('truncated game record file')
+        yield from _words(buf)
+
+
+def iter_records(f, chunk_words=65536):
+    for word in iter_words(f, chunk_words):
+        yield decode(word)
+
+
+class RecordFile:
+    """ Random access to a record file through mmap """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        _check_header(self._map[:len(MAGIC)])
+        if (len(self._map) - len(MAGIC)) % WORD:
+            raise ValueError('truncated game record file')
+
+    def __len__(self):
+        return (len(self._map) - len(MAGIC)) // WORD
+
+    def word(self, i):
+        if not -len(self) <= i < len(self):
+            raise IndexError('record index out of range')
+        i %= len(self)
+        start = len(MAGIC) + i * WORD
+        return int.from_bytes(self._map[start:start + WORD], 'little')
+
+    def __getitem__(self, i):
+        return decode(self.word(i))
+
+    def words(self, start=0, stop=None):
+        # raw words of a slice in one copy
+        stop = len(self) if stop is None else min(stop, len(self))
+        return _words(self._map[len(MAGIC) + start * WORD:len(MAGIC) + stop * WORD])
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def text_to_binary(lines, path, starting_player='X'):
+    # converts tests_str-style lines into a record file, returns the count
+    n = 0
+    with open(path, 'wb') as f, RecordWriter(f) as writer:
+        for record in iter_text(lines, starting_player):
+            writer.write(record)
+            n += 1
+    return n
+
+
+def binary_to_text(path):
+    # yields one tests_str-style line per record
+    with open(path, 'rb') as f:
+        for record in iter_records(f):
+            yield to_text(record)
@@ -0,0 +1,114 @@
+##########################################
+# BOARD RENDERERS                        #
+##########################################
+# The game loops draw through a renderer instead of printing directly:
+#   StreamRenderer  formats the whole board and writes it in one call
+#                   (the classic X|O|- rows, one per line)
+#   DiffRenderer    ANSI terminals only: draws the board once at the top of
+#                   the screen, then rewrites just the cells that changed.
+#                   Everything else scrolls in the region below the board
+#   NullRenderer    does nothing, not even formatting; for headless and
+#                   bulk replays
+#
+# A renderer has board(board), text(line) and close(). Writes go to the
+# stream given, or to whatever sys.stdout is at the time of the write.
+#
+#   render.use('diff')     # renderer game.play_game(echo=True) uses
+#   game.run_game(rules, moves, echo=render.NULL)
+
+import sys
+
+
+def format_board(board):
+    return '\n'.join('|'.join(row) for row in board) + '\n'
+
+
+class StreamRenderer:
+    """ Whole board in a single write """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def _write(self, text):
+        (self.stream or sys.stdout).write(text)
+
+    def board(self, board):
+        self._write(format_board(board))
+
+    def text(self, line):
+        self._write(line + '\n')
+
+    def close(self):
+        pass
+
+
+class DiffRenderer(StreamRenderer):
+    """ In-place ANSI redraw of the cells that changed """
+
+    def __init__(self, stream=None):
+        super().__init__(stream)
+        self.shown = None  # rows as last drawn
+
+    def board(self, board):
+        if self.shown is None or len(self.shown) != len(board) \
+                or len(self.shown[0]) != len(board[0]):
+            # clear, draw at home, keep the board out of the scroll region
+            # and park the cursor below it
+            m = len(board)
+            self._write(f'\x1b[2J\x1b[H{format_board(board)}'
+                        f'\x1b[{m + 2}r\x1b[{m + 2};1H')
+        else:
+            out = []
+            for r, (old, new) in enumerate(zip(self.shown, board)):
+                if old != new:
+                    for c, v in enumerate(new):
+                        if old[c] != v:
+                            out.append(f'\x1b[{r + 1};{2 * c + 1}H{v}')
+            if not out:
+                return
+            self._write('\x1b7' + ''.join(out) + '\x1b8')
+        self.shown = [list(row) for row in board]
+
+    def close(self):
+        # give the whole screen back to scrolling
+        if self.shown is not None:
+            self._write('\x1b7\x1b[r\x1b8')
+            self.shown = None
+
+
+class NullRenderer:
+    """ Renders nothing """
+
+    def board(self, board):
+        pass
+
+    def text(self, line):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL = NullRenderer()
+RENDERERS = {
+    'stream': StreamRenderer,
+    'diff': DiffRenderer,
+    'null': NullRenderer,
+}
+default = StreamRenderer()
+
+
+def use(name, stream=None):
+    # sets the renderer used when a game echoes its board and returns it
+    global default
+    default = NULL if name == 'null' else RENDERERS[name](stream)
+    return default
+
+
+def resolve(echo):
+    # echo flag or renderer -> renderer
+    if echo is True:
+        return default
+    if not echo:
+        return NULL
+    return echo
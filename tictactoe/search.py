@@ -0,0 +1,351 @@
+##########################################
+# PARALLEL ALPHA-BETA SEARCH             #
+##########################################
+# Iterative-deepening negamax with alpha-beta pruning for any m,n,k board,
+# meant for the variants too big to solve outright (4x4, 5x5 and up).
+#
+#   - positions are a pair of bitboards (bit row * n + col), wins are
+#     checked only against the lines through the cell just played (see
+#     game.line_masks) and hashed with the Zobrist keys of game.zobrist
+#   - move ordering: transposition table move, then two killer moves per
+#     ply, then the rest by history score
+#   - leaves are scored by the lines still open to each side
+#   - lazy SMP: helper processes run the same iterative deepening on the
+#     same root (with their own killers and history, and a shuffled root
+#     order) and share nothing but the transposition table (ttable.py,
+#     two-tier by default), which lives in multiprocessing.shared_memory.
+#     Its slots are written without locks
+#
+# AlphaBetaPlayer is a move provider: pass it to play_game wherever
+# get_next_move would supply moves. Helpers are forked once and reused for
+# every move; where fork is not available the search runs in one process.
+#
+#   with search.AlphaBetaPlayer(mnk.Rules(4, 4, 4), time_limit=1.0) as ai:
+#       game.play_game(ai.rules, {'O': ai})
+
+from multiprocessing import shared_memory
+import multiprocessing
+import os
+import queue
+import random
+import time
+import weakref
+
+import game
+import mnk
+import ttable
+
+WIN = 1 << 20       # fits the score field of ttable entries
+MATE = WIN - 1024   # scores beyond +-MATE are forced wins/losses
+INF = WIN + 1
+EXACT, LOWER, UPPER = ttable.EXACT, ttable.LOWER, ttable.UPPER
+CHECK_EVERY = 255   # nodes between two looks at the clock and stop flag
+HELPER_TIMEOUT = 5.0  # seconds a stopped helper gets to report back
+
+
+class _Stop(Exception):
+    pass
+
+
+##########################################
+# SHARED TRANSPOSITION TABLE             #
+##########################################
+
+class SharedTable(ttable.TranspositionTable):
+    """ TranspositionTable in shared memory, behind a stop flag word """
+
+    HEADER_WORDS = 2  # word 0 is the stop flag
+
+    def __init__(self, entries=1 << 18, policy='two-tier'):
+        words = self.size_in_words(entries, policy)
+        self.shm = shared_memory.SharedMemory(create=True,
+                                              size=8 * (self.HEADER_WORDS + words))
+        view = self.shm.buf.cast('Q')
+        super().__init__(entries, policy, view, self.HEADER_WORDS)
+        self._finalizer = weakref.finalize(self, _release, self.shm, view)
+
+    def clear(self):
+        start = 8 * self.HEADER_WORDS
+        self.shm.buf[start:] = bytes(len(self.shm.buf) - start)
+
+    @property
+    def stopped(self):
+        return self.words[0] != 0
+
+    def stop(self):
+        self.words[0] = 1
+
+    def start(self):
+        self.words[0] = 0
+
+    def close(self):
+        self.words = None
+        self._finalizer()
+
+
+def _release(shm, words):
+    words.release()
+    shm.close()
+    shm.unlink()
+
+
+##########################################
+# SEARCH                                 #
+##########################################
+
+class Searcher:
+    """ One thread of the search: iterative deepening on a shared table """
+
+    def __init__(self, rules, table, worker=0):
+        self.rules = rules
+        self.table = table
+        self.worker = worker
+        self.cells = rules.m * rules.n
+        self.full = (1 << self.cells) - 1
+        self.line_masks, self.cell_masks = game.line_masks(rules)
+        self.weights = [0] + [4 ** i for i in range(1, rules.k + 1)]
+        keys, self.side_key, move_keys = game.zobrist(rules)
+        self.keys = (keys['X'], keys['O'])
+        self.move_keys = (move_keys['X'], move_keys['O'])
+        self.rng = random.Random(worker)
+        self.nodes = 0
+        self.deadline = None
+
+    def root_hash(self, x, o, player):
+        h = self.side_key if player == 1 else 0
+        for bits, keys in ((x, self.keys[0]), (o, self.keys[1])):
+            while bits:
+                low = bits & -bits
+                h ^= keys[low.bit_length() - 1]
+                bits ^= low
+        return h
+
+    def evaluate(self, me, opp):
+        # lines only one side can still complete, weighted by how far along
+        score = 0
+        weights = self.weights
+        for mask in self.line_masks:
+            a, b = me & mask, opp & mask
+            if a and not b:
+                score += weights[a.bit_count()]
+            elif b and not a:
+                score -= weights[b.bit_count()]
+        return score
+
+    def _ordered(self, empty, tt_move, ply, player):
+        history = self.history[player]
+        cells = []
+        while empty:
+            low = empty & -empty
+            cells.append(low.bit_length() - 1)
+            empty ^= low
+        cells.sort(key=history.__getitem__, reverse=True)
+        front = [tt_move] + self.killers[ply]
+        first = [c for c in front if c in cells]
+        return list(dict.fromkeys(first + cells))
+
+    def _check(self):
+        if self.table.stopped or (self.deadline is not None
+                                  and time.monotonic() >= self.deadline):
+            raise _Stop
+
+    def negamax(self, me, opp, player, h, depth, alpha, beta, ply):
+        self.nodes += 1
+        if not self.nodes & CHECK_EVERY:
+            self._check()
+        tt_move = -1
+        entry = self.table.probe(h)
+        if entry is not None:
+            d, flag, score, tt_move = entry
+            if score >= MATE:
+                score -= ply
+            elif score <= -MATE:
+                score += ply
+            if d >= depth and (flag == EXACT or (flag == LOWER and score >= beta)
+                               or (flag == UPPER and score <= alpha)):
+                return score
+        empty = self.full & ~(me | opp)
+        if not empty:
+            return 0
+        if depth == 0:
+            return self.evaluate(me, opp)
+        alpha0 = alpha
+        best, best_move = -INF, -1
+        keys = self.move_keys[player]
+        for c in self._ordered(empty, tt_move, ply, player):
+            nme = me | (1 << c)
+            if game.completes_line(self.cell_masks, nme, c):
+                score = WIN - ply - 1
+            else:
+                score = -self.negamax(opp, nme, player ^ 1, h ^ keys[c], depth - 1,
+                                      -beta, -alpha, ply + 1)
+            if score > best:
+                best, best_move = score, c
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        killers = self.killers[ply]
+                        if c not in killers:
+                            killers.insert(0, c)
+                            del killers[2:]
+                        self.history[player][c] += depth * depth
+                        break
+        flag = UPPER if best <= alpha0 else LOWER if best >= beta else EXACT
+        stored = best + ply if best >= MATE else best - ply if best <= -MATE else best
+        self.table.store(h, depth, flag, stored, best_move)
+        return best
+
+    def _root(self, x, o, player, h, depth, order):
+        me, opp = (x, o) if player == 0 else (o, x)
+        alpha, best_move = -INF, order[0]
+        keys = self.move_keys[player]
+        for c in order:
+            nme = me | (1 << c)
+            if game.completes_line(self.cell_masks, nme, c):
+                score = WIN - 1
+            else:
+                score = -self.negamax(opp, nme, player ^ 1, h ^ keys[c], depth - 1,
+                                      -INF, -alpha, 1)
+            if score > alpha:
+                alpha, best_move = score, c
+        self.table.store(h, depth, EXACT, alpha, best_move)
+        return alpha, best_move
+
+    def iterate(self, x, o, player, max_depth=None, deadline=None):
+        # Deepens one ply at a time until max_depth, the deadline, the
+        # shared stop flag, or a proven result. Returns (move, score,
+        # depth reached); move is a cell index, -1 on a full board
+        self.deadline = deadline
+        self.nodes = 0
+        self.history = ([0] * self.cells, [0] * self.cells)
+        empty = self.full & ~(x | o)
+        order = [c for c in range(self.cells) if empty >> c & 1]
+        if not order:
+            return -1, 0, 0
+        if self.worker:
+            self.rng.shuffle(order)
+        h = self.root_hash(x, o, player)
+        max_depth = min(max_depth or len(order), len(order))
+        best_move, best_score, reached = order[0], 0, 0
+        # helpers start a ply deeper every other worker, so they do not
+        # all walk the same tree in the same order
+        depth = 1 + (self.worker & 1)
+        while depth <= max_depth:
+            self.killers = [[] for _ in range(len(order) + 1)]
+            try:
+                score, move = self._root(x, o, player, h, depth, order)
+            except _Stop:
+                break
+            best_move, best_score, reached = move, score, depth
+            order.remove(move)
+            order.insert(0, move)
+            if abs(score) >= MATE:
+                break
+            depth += 1
+        return best_move, best_score, reached
+
+
+##########################################
+# MOVE PROVIDER                          #
+##########################################
+
+def _helper(rules, table, tasks, done, worker):
+    searcher = Searcher(rules, table, worker)
+    for task in iter(tasks.get, None):
+        searcher.iterate(*task)
+        done.put((worker, searcher.nodes))
+
+
+class AlphaBetaPlayer:
+    """ Lazy-SMP alpha-beta move provider with a time and/or depth budget """
+
+    def __init__(self, rules=mnk.TICTACTOE, time_limit=1.0, max_depth=None,
+                 jobs=None, table_entries=1 << 18, table_policy='two-tier'):
+        self.rules = rules
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.table = SharedTable(table_entries, table_policy)
+        self.searcher = Searcher(rules, self.table)
+        self.helpers = []
+        self.last_stats = {}
+        jobs = jobs or os.cpu_count() or 1
+        if jobs > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            ctx = multiprocessing.get_context('fork')
+            self.done = ctx.Queue()
+            for worker in range(1, jobs):
+                tasks = ctx.SimpleQueue()
+                p = ctx.Process(target=_helper, daemon=True,
+                                args=(rules, self.table, tasks, self.done, worker))
+                p.start()
+                self.helpers.append((worker, p, tasks))
+
+    def search(self, board, player):
+        # returns (move, score, depth) for player on board
+        x, o = game.board_bits(board)
+        side = 0 if player == 'X' else 1
+        start = time.monotonic()
+        deadline = None if self.time_limit is None else start + self.time_limit
+        task = (x, o, side, self.max_depth, deadline)
+        self.table.start()
+        self.table.reset_stats()
+        for _, _, tasks in self.helpers:
+            tasks.put(task)
+        move, score, depth = self.searcher.iterate(*task)
+        self.table.stop()
+        nodes = self.searcher.nodes + self._collect()
+        seconds = time.monotonic() - start
+        self.last_stats = {
+            'depth': depth,
+            'score': score,
+            'nodes': nodes,
+            'seconds': seconds,
+            'nodes_per_sec': nodes / seconds if seconds else 0.0,
+            'workers': len(self.helpers) + 1,
+            'table': self.table.stats(),  # this process's probes only
+        }
+        return (None if move < 0 else divmod(move, self.rules.n)), score, depth
+
+    def _collect(self):
+        # Nodes searched by the helpers, once each has reported back. The
+        # stop flag is up, so a live helper answers within CHECK_EVERY
+        # nodes; a helper that died, or is still silent after
+        # HELPER_TIMEOUT, is dropped so no later move waits on it
+        waiting = {worker for worker, _, _ in self.helpers}
+        nodes = 0
+        give_up = time.monotonic() + HELPER_TIMEOUT
+        while waiting:
+            try:
+                worker, n = self.done.get(timeout=0.05)
+            except queue.Empty:
+                lost = {worker for worker, p, _ in self.helpers
+                        if worker in waiting and not p.is_alive()}
+                if time.monotonic() >= give_up:
+                    lost = set(waiting)
+                for worker, p, _ in self.helpers:
+                    if worker in lost:
+                        p.kill()
+                        p.join()
+                self.helpers = [h for h in self.helpers if h[0] not in lost]
+                waiting -= lost
+                continue
+            waiting.discard(worker)
+            nodes += n
+        return nodes
+
+    def __call__(self, board, player):
+        return self.search(board, player)[0]
+
+    def close(self):
+        for _, p, tasks in self.helpers:
+            if p.is_alive():
+                tasks.put(None)
+        for _, p, _ in self.helpers:
+            p.join(1)
+        self.helpers = []
+        self.table.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
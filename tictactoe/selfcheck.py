@@ -0,0 +1,177 @@
+##########################################
+# BEHAVIOUR SELF-CHECK                   #
+##########################################
+# Small known-answer checks for the pieces verify.py does not reach: the
+# transposition table's replacement policies and counters, binary game
+# records, GameState's incremental hash and the move parser. Each check
+# returns a list of (what, expected, got) for the cases that fail.
+#
+#   python selfcheck.py
+
+import random
+import sys
+
+import bitboard
+import game
+import mnk
+import moveparse
+import records
+import ttable
+
+# three keys that share bucket 0 of a table with two buckets
+A, B, C = 2, 4, 6
+
+
+##########################################
+# TRANSPOSITION TABLE                    #
+##########################################
+
+def _depth(table, key):
+    entry = table.probe(key)
+    return None if entry is None else entry[0]
+
+
+def _counters(table):
+    stats = table.stats()
+    return {k: stats[k] for k in ('stores', 'evictions', 'rejections')}
+
+
+def check_ttable():
+    problems = []
+
+    def expect(what, expected, got):
+        if got != expected:
+            problems.append((what, expected, got))
+
+    t = ttable.TranspositionTable(2, 'always')
+    t.store(A, 5, ttable.EXACT, 0, 0)
+    t.store(B, 1, ttable.EXACT, 0, 0)
+    expect('always: shallow entry replaces a deep one', (None, 1),
+           (_depth(t, A), _depth(t, B)))
+    expect('always: counters', {'stores': 2, 'evictions': 1, 'rejections': 0}, _counters(t))
+
+    t = ttable.TranspositionTable(2, 'depth')
+    t.store(A, 5, ttable.EXACT, 0, 0)
+    expect('depth: shallower entry rejected', False, t.store(B, 3, ttable.EXACT, 0, 0))
+    t.store(A, 1, ttable.EXACT, 0, 0)
+    expect('depth: same position replaces a deeper copy', 1, _depth(t, A))
+    t.store(B, 2, ttable.EXACT, 0, 0)
+    expect('depth: deeper entry replaces', (None, 2), (_depth(t, A), _depth(t, B)))
+    expect('depth: counters', {'stores': 3, 'evictions': 1, 'rejections': 1}, _counters(t))
+
+    t = ttable.TranspositionTable(4, 'two-tier')
+    t.store(A, 5, ttable.EXACT, 0, 0)
+    t.store(B, 3, ttable.EXACT, 0, 0)
+    expect('two-tier: shallower entry goes to tier two', (5, 3), (_depth(t, A), _depth(t, B)))
+    t.store(C, 7, ttable.EXACT, 0, 0)
+    expect('two-tier: deeper entry demotes tier one', (5, None, 7),
+           (_depth(t, A), _depth(t, B), _depth(t, C)))
+    t.store(A, 9, ttable.EXACT, 0, 0)
+    expect('two-tier: promoted position leaves no stale copy', (9, 7, 2),
+           (_depth(t, A), _depth(t, C), t.filled()))
+    expect('two-tier: counters', {'stores': 4, 'evictions': 1, 'rejections': 0}, _counters(t))
+    return problems
+
+
+##########################################
+# GAMES                                  #
+##########################################
+
+def _random_games(rules, count, rng):
+    # (state, moves) for count random games played to the end
+    for _ in range(count):
+        state = game.GameState(rules, rng.choice(bitboard.PLAYERS))
+        moves = []
+        while not state.is_over():
+            move = rng.choice(list(state.legal_moves()))
+            state.apply(move)
+            moves.append(move)
+        yield state, moves
+
+
+def check_records(count=500, seed=1):
+    problems = []
+    rng = random.Random(seed)
+    for state, moves in _random_games(mnk.TICTACTOE, count, rng):
+        x, o = bitboard.from_board(state.board)
+        line = bitboard.winning_line(x, o)
+        record = records.GameRecord(state.winner or 'T', moves,
+                                    records.LINE_NAMES[line] if line >= 0 else '-',
+                                    state.starting_player)
+        for cut in (len(moves), rng.randrange(len(moves) + 1)):
+            if cut < len(moves):
+                record = record._replace(winner='I', moves=moves[:cut], line='-')
+            got = records.decode(records.encode(record))
+            if got != record:
+                problems.append(('decode(encode(record))', record, got))
+            got = records.from_text(records.to_text(record), record.starting_player)
+            if got != record:
+                problems.append(('from_text(to_text(record))', record, got))
+    return problems
+
+
+def check_hash(count=200, seed=2):
+    # the incremental hash matches a fresh position_hash after every move,
+    # and undoing every move brings back the starting hash
+    problems = []
+    rng = random.Random(seed)
+    for rules in (mnk.TICTACTOE, mnk.Rules(4, 5, 3)):
+        for state, moves in _random_games(rules, count, rng):
+            start = game.position_hash(mnk.new_board(rules), state.starting_player, rules)
+            expected = game.position_hash(state.board, state.player, rules)
+            if state.hash != expected:
+                problems.append((f'hash after {moves}', expected, state.hash))
+            while state.history:
+                state.undo()
+            if state.hash != start:
+                problems.append((f'hash after undoing {moves}', start, state.hash))
+    return problems
+
+
+##########################################
+# MOVE PARSING                           #
+##########################################
+
+PARSE_CASES = (
+    ('b2', moveparse.TICTACTOE, '1,1'),
+    ('B2', moveparse.TICTACTOE, '(1, 1)'),
+    ('a1', moveparse.TICTACTOE, '0,0'),
+    ('5', moveparse.TICTACTOE, '1,1'),
+    ('7', moveparse.TICTACTOE, '0,0'),
+    ('3', moveparse.TICTACTOE, '2,2'),
+    ('d4', (4, 4, 3), '3,3'),
+)
+
+
+def check_parse():
+    problems = []
+    for text, rules, same_as in PARSE_CASES:
+        expected, got = moveparse.parse_move(same_as, rules), moveparse.parse_move(text, rules)
+        if got != expected:
+            problems.append((f'parse_move({text!r})', expected, got))
+    got = moveparse.parse_move('7', (4, 4, 3))
+    if not moveparse.is_error(got) or got.reason != moveparse.SYNTAX:
+        problems.append(("parse_move('7') on 4x4", moveparse.SYNTAX, got))
+    got = moveparse.parse_move('d1')
+    if not moveparse.is_error(got) or got.reason != moveparse.OUT_OF_RANGE:
+        problems.append(("parse_move('d1')", moveparse.OUT_OF_RANGE, got))
+    return problems
+
+
+CHECKS = {
+    'ttable': check_ttable,
+    'records': check_records,
+    'hash': check_hash,
+    'parse': check_parse,
+}
+
+
+if __name__ == '__main__':
+    failed = 0
+    for name, check in CHECKS.items():
+        problems = check()
+        failed += len(problems)
+        print(f'{name}: {"ok" if not problems else f"{len(problems)} failures"}')
+        for what, expected, got in problems[:10]:
+            print(f'  {what}: expected {expected!r}, got {got!r}')
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,227 @@
+##########################################
+# ASYNCIO GAME SERVER                    #
+##########################################
+# Hosts many independent games in one process. Every TCP connection is its
+# own session with its own GameState (see game.run_game_async); nothing
+# is shared through main.py's module-level board. The client plays
+# CLIENT_PLAYER and a server-side bot plays the other side.
+#
+# Line protocol, server to client:
+#   BOARD X-O/---/--X     the board, rows separated by '/'
+#   TURN X                the client should send a move for X
+#   ERR <reason>          the last move was rejected; send another one
+#   END X|O|TIE|INCOMPLETE
+# Client to server: one move per line in the (row,col) syntax that
+# input_str_is_valid accepts, e.g. "1,2" or "(1, 2)".
+#
+#   python server.py serve --port 8765 --bot solver
+#   python server.py loadtest --port 8765 --sessions 2000 --concurrency 500
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+
+import game
+import mcts
+import mnk
+import moveparse
+import tournament
+
+CLIENT_PLAYER = 'X'
+
+
+def encode_board(board):
+    return '/'.join(''.join(row) for row in board)
+
+
+def decode_board(text):
+    return [list(row) for row in text.split('/')]
+
+
+def make_bot(spec, rules, rng):
+    # bots from tournament.py (3x3 only) or "mcts" for any board. MCTS runs
+    # in the default executor so a long search doesn't stall other sessions
+    if spec == 'mcts':
+        player = mcts.MCTSPlayer(rules, time_limit=0.05, seed=rng.random())
+
+        async def provider(board, p):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, player, [r[:] for r in board], p)
+        return provider
+    if rules != mnk.TICTACTOE:
+        m, n, k = rules
+        raise ValueError(f'bot {spec!r} only plays 3x3; use mcts for {m},{n},{k}')
+    return tournament.make_player(spec, rng)
+
+
+class GameServer:
+    """ One asyncio server, one session per connection """
+
+    def __init__(self, rules=mnk.TICTACTOE, bot='solver', seed=None):
+        make_bot(bot, rules, random.Random())  # a bad bot fails here, not per session
+        self.rules = rules
+        self.bot = bot
+        self.rng = random.Random(seed)
+        self.active = 0
+        self.finished = 0
+        self.failed = 0
+
+    async def _send(self, writer, *lines):
+        writer.write(''.join(line + '\n' for line in lines).encode())
+        await writer.drain()
+
+    def _client_provider(self, reader, writer):
+        async def provider(board, player):
+            await self._send(writer, f'BOARD {encode_board(board)}', f'TURN {player}')
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return None  # client went away; the game ends unfinished
+                text = line.decode(errors='replace').strip()
+                if not mnk.input_str_is_valid(text):
+                    await self._send(writer, 'ERR could not parse move')
+                    continue
+                move = moveparse.parse_move(text, self.rules)
+                if moveparse.is_error(move) or board[move[0]][move[1]] != mnk.EMPTY:
+                    await self._send(writer, 'ERR invalid move')
+                    continue
+                return move
+        return provider
+
+    async def handle(self, reader, writer):
+        self.active += 1
+        try:
+            bot_player = 'O' if CLIENT_PLAYER == 'X' else 'X'
+            players = {
+                CLIENT_PLAYER: self._client_provider(reader, writer),
+                bot_player: make_bot(self.bot, self.rules, self.rng),
+            }
+            try:
+                state = await game.run_game_async(self.rules, players, 'X')
+            except (ConnectionError, asyncio.IncompleteReadError):
+                raise
+            except Exception as e:
+                # a failing bot ends its own session, not the server
+                self.failed += 1
+                print(f'session failed: {type(e).__name__}: {e}', file=sys.stderr)
+                await self._send(writer, 'END INCOMPLETE')
+                return
+            if state.winner:
+                result = state.winner
+            else:
+                result = 'TIE' if state.is_full() else 'INCOMPLETE'
+            await self._send(writer, f'BOARD {encode_board(state.board)}', f'END {result}')
+            self.finished += 1
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.active -= 1
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        server = await asyncio.start_server(self.handle, host, port, backlog=4096)
+        async with server:
+            await server.serve_forever()
+
+
+##########################################
+# LOAD-TEST CLIENT                       #
+##########################################
+
+async def play_client(host, port, rng, latencies):
+    # one session with random legal moves; records seconds from sending a
+    # move to receiving the next TURN or END
+    reader, writer = await asyncio.open_connection(host, port)
+    board = None
+    sent = None
+    result = None
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            kind, _, arg = line.decode().strip().partition(' ')
+            if kind == 'BOARD':
+                board = decode_board(arg)
+            elif kind in ('TURN', 'END'):
+                if sent is not None:
+                    latencies.append(time.perf_counter() - sent)
+                if kind == 'END':
+                    result = arg
+                    break
+                empty = [(r, c) for r, row in enumerate(board)
+                         for c, v in enumerate(row) if v == mnk.EMPTY]
+                r, c = rng.choice(empty)
+                sent = time.perf_counter()
+                writer.write(f'{r},{c}\n'.encode())
+                await writer.drain()
+    finally:
+        writer.close()
+    return result
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+async def load_test(host='127.0.0.1', port=8765, sessions=1000, concurrency=200,
+                    seed=0):
+    rng = random.Random(seed)
+    latencies = []
+    results = {}
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with limit:
+            result = await play_client(host, port, rng, latencies)
+            results[result] = results.get(result, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(sessions)))
+    seconds = time.perf_counter() - start
+    return {
+        'sessions': sessions,
+        'concurrency': concurrency,
+        'seconds': seconds,
+        'moves': len(latencies),
+        'moves_per_sec': len(latencies) / seconds,
+        'latency_p50_ms': percentile(latencies, 50) * 1000,
+        'latency_p95_ms': percentile(latencies, 95) * 1000,
+        'latency_p99_ms': percentile(latencies, 99) * 1000,
+        'results': results,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='tictactoe game server')
+    parser.add_argument('mode', choices=('serve', 'loadtest'))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--bot', default='solver',
+                        help='random, heuristic, solver (3x3) or mcts')
+    parser.add_argument('--size', default='3,3,3', help='m,n,k')
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.mode == 'serve':
+        rules = mnk.Rules(*(int(v) for v in args.size.split(',')))
+        try:
+            server = GameServer(rules, args.bot)
+        except ValueError as e:
+            sys.exit(str(e))
+        asyncio.run(server.serve(args.host, args.port))
+    else:
+        report = asyncio.run(load_test(args.host, args.port, args.sessions,
+                                       args.concurrency))
+        for key, value in report.items():
+            print(f'{key:16s} {value:.2f}' if isinstance(value, float)
+                  else f'{key:16s} {value}')
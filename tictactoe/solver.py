@@ -0,0 +1,88 @@
+##########################################
+# PERFECT-PLAY SOLVER                    #
+##########################################
+# Negamax over bitboards with a transposition table. Positions are stored
+# from the point of view of the player to move ("me" vs "opp"), so a game
+# started by X and a game started by O share the same entries.
+#
+# Scores: 0 is a draw, a win is worth 1 + the number of empty cells left
+# when it happens, so faster wins score higher and slower losses score
+# less badly.
+
+import bitboard
+
+# key -> (score, mask of every move reaching that score)
+# key is me | (opp << 9)
+_table = {}
+
+
+def _key(me, opp):
+    return me | (opp << bitboard.CELLS)
+
+
+def negamax(me, opp):
+    key = _key(me, opp)
+    entry = _table.get(key)
+    if entry is not None:
+        return entry[0]
+
+    empty = bitboard.legal_mask(me, opp)
+    if bitboard.FIRST_LINE[opp] >= 0:  # opponent just completed a line
+        score, best = -(bin(empty).count('1') + 1), 0
+    elif not empty:
+        score, best = 0, 0
+    else:
+        score, best = None, 0
+        for c in bitboard.iter_cells(empty):
+            b = 1 << c
+            s = -negamax(opp, me | b)
+            if score is None or s > score:
+                score, best = s, b
+            elif s == score:
+                best |= b
+    _table[key] = (score, best)
+    return score
+
+
+def solve():
+    # solves every position reachable from the empty board, once per process
+    if not _table:
+        negamax(0, 0)
+    return len(_table)
+
+
+def _lookup(me, opp):
+    key = _key(me, opp)
+    if key not in _table:
+        negamax(me, opp)
+    return _table[key]
+
+
+def _sides(board, player):
+    x, o = bitboard.from_board(board)
+    return (x, o) if player == 'X' else (o, x)
+
+
+def position_value(board, player):
+    # exact score of board for player, who is about to move
+    me, opp = _sides(board, player)
+    return _lookup(me, opp)[0]
+
+
+def best_moves(board, player):
+    # every optimal (row, col) for player, in cell order
+    me, opp = _sides(board, player)
+    best = _lookup(me, opp)[1]
+    return [divmod(c, bitboard.SIZE) for c in bitboard.iter_cells(best)]
+
+
+def solver_move(board, player):
+    # move provider for play_game: returns the first optimal move
+    me, opp = _sides(board, player)
+    best = _lookup(me, opp)[1]
+    if not best:
+        return None
+    return divmod((best & -best).bit_length() - 1, bitboard.SIZE)
+
+
+solve()
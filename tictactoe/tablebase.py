@@ -0,0 +1,263 @@
+##########################################
+# ON-DISK TABLEBASE                      #
+##########################################
+# Value, distance to the end and best moves for every 3x3 position with
+# either player to move, found by retrograde analysis and stored in a flat
+# file that is mmap'ed on first use. Loading parses a 24-byte header and
+# checks a CRC, so a process asking for a move pays microseconds instead of
+# a search, and worker processes share the same page-cache pages.
+#
+# Entry i covers board b (base 3, cell c is digit c: 0 empty, 1 X, 2 O)
+# with side s to move (0 X, 1 O), i = 2 * b + s:
+#
+#   VALUE  int8    1 win, 0 draw, -1 loss for the side to move
+#   DTE    uint8   plies to the end of the game with perfect play
+#                  (winner hurries, loser stalls); UNREACHABLE for
+#                  illegal positions (piece counts off by more than the
+#                  turn order allows, or the side to move has a line)
+#   BEST   uint16  mask of every move reaching that value and DTE
+#
+# File: header struct HEADER (MAGIC, VERSION, flags, entries, payload
+# bytes, CRC-32 of the payload) followed by the three columns in that
+# order, little-endian.
+#
+#   python tablebase.py build [path]
+#   python tablebase.py verify [path]
+#   python tablebase.py check
+
+from array import array
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import zlib
+
+import bitboard
+
+MAGIC = b'TTTBASE\x00'
+VERSION = 1
+HEADER = struct.Struct('<8sHHIII')
+ENTRIES = 2 * 3 ** bitboard.CELLS
+UNREACHABLE = 255
+PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tablebase.bin')
+
+# bitboard -> its base-3 digits with each set cell worth 1
+_TERNARY = [sum(3 ** c for c in bitboard.iter_cells(bits))
+            for bits in range(bitboard.FULL + 1)]
+
+
+def index(x, o, player):
+    return 2 * (_TERNARY[x] + 2 * _TERNARY[o]) + (player == 'O')
+
+
+##########################################
+# RETROGRADE ANALYSIS                    #
+##########################################
+
+def rank(value, dte):
+    # orders outcomes for the side to move: quick wins, draws, slow losses
+    return value * (100 - dte) if value else 0
+
+
+def analyse():
+    # returns (values, dtes, bests) arrays of ENTRIES items. Every move adds
+    # a piece, so going from full boards down to the empty one means all
+    # successors of a position are final before the position is looked at
+    values = array('b', bytes(ENTRIES))
+    dtes = array('B', [UNREACHABLE]) * ENTRIES
+    bests = array('H', bytes(2 * ENTRIES))
+    by_pieces = [[] for _ in range(bitboard.CELLS + 1)]
+    for x in range(bitboard.FULL + 1):
+        free = bitboard.FULL & ~x
+        o = free
+        while True:  # every subset of the cells x leaves free
+            by_pieces[bin(x | o).count('1')].append((x, o))
+            if not o:
+                break
+            o = (o - 1) & free
+    for positions in reversed(by_pieces):
+        for x, o in positions:
+            for player in bitboard.PLAYERS:
+                me, opp = (x, o) if player == 'X' else (o, x)
+                # the side to move has played as often as, or once less
+                # than, the other side, and only the last mover can have
+                # a line
+                ahead = bin(opp).count('1') - bin(me).count('1')
+                if ahead not in (0, 1) or bitboard.FIRST_LINE[me] >= 0:
+                    continue
+                i = index(x, o, player)
+                if bitboard.FIRST_LINE[opp] >= 0:
+                    values[i], dtes[i] = -1, 0
+                    continue
+                empty = bitboard.legal_mask(x, o)
+                if not empty:
+                    values[i], dtes[i] = 0, 0
+                    continue
+                other = 'O' if player == 'X' else 'X'
+                best_rank, best = None, 0
+                for c in bitboard.iter_cells(empty):
+                    b = 1 << c
+                    j = index(x | b, o, other) if player == 'X' else index(x, o | b, other)
+                    value, dte = -values[j], dtes[j] + 1
+                    r = rank(value, dte)
+                    if best_rank is None or r > best_rank:
+                        best_rank, best = r, b
+                        values[i], dtes[i] = value, dte
+                    elif r == best_rank:
+                        best |= b
+                bests[i] = best
+    return values, dtes, bests
+
+
+def build(path=PATH):
+    # runs the analysis and writes the file atomically
+    columns = analyse()
+    if sys.byteorder == 'big':
+        columns[2].byteswap()
+    payload = b''.join(col.tobytes() for col in columns)
+    header = HEADER.pack(MAGIC, VERSION, 0, ENTRIES, len(payload), zlib.crc32(payload))
+    tmp = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(header)
+            f.write(payload)
+        os.replace(tmp, path)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return path
+
+
+##########################################
+# LOADING AND PROBING                    #
+##########################################
+
+class Tablebase:
+    """ Read-only view of a tablebase file through mmap """
+
+    def __init__(self, path=PATH):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size:
+            raise ValueError('truncated tablebase file')
+        magic, version, _, entries, size, crc = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError('not a tablebase file')
+        if version != VERSION:
+            raise ValueError(f'tablebase version {version}, expected {VERSION}')
+        if entries != ENTRIES or len(self._map) != HEADER.size + size:
+            raise ValueError('truncated tablebase file')
+        view = memoryview(self._map)[HEADER.size:]
+        if zlib.crc32(view) != crc:
+            raise ValueError('tablebase checksum mismatch')
+        self.values = view[:ENTRIES].cast('b')
+        self.dtes = view[ENTRIES:2 * ENTRIES]
+        self.bests = view[2 * ENTRIES:4 * ENTRIES]
+        if sys.byteorder == 'little':
+            self.bests = self.bests.cast('H')
+        else:
+            self.bests = array('H', self.bests)
+            self.bests.byteswap()
+
+    def probe(self, board, player):
+        # (value, dte, best mask) for player to move on board, or None for
+        # an illegal position
+        x, o = bitboard.from_board(board)
+        i = index(x, o, player)
+        if self.dtes[i] == UNREACHABLE:
+            return None
+        return self.values[i], self.dtes[i], self.bests[i]
+
+
+class MemoryTablebase(Tablebase):
+    """ The same columns computed by analyse() and kept in memory """
+
+    def __init__(self):
+        self.values, self.dtes, self.bests = analyse()
+
+
+_loaded = None
+
+
+def load(path=PATH):
+    # the shared Tablebase, built and written on first use if path is
+    # missing, or rebuilt if the file there is stale or damaged. Where the
+    # file can be neither read nor written (a read-only install) the
+    # analysis runs in memory instead, once per process
+    global _loaded
+    if _loaded is None:
+        try:
+            if not os.path.exists(path):
+                build(path)
+            try:
+                _loaded = Tablebase(path)
+            except ValueError:
+                _loaded = Tablebase(build(path))
+        except OSError:
+            _loaded = MemoryTablebase()
+    return _loaded
+
+
+def best_moves(board, player):
+    # every optimal (row, col) for player, in cell order
+    entry = load().probe(board, player)
+    if entry is None:
+        return []
+    return [divmod(c, bitboard.SIZE) for c in bitboard.iter_cells(entry[2])]
+
+
+def tablebase_move(board, player):
+    # move provider for play_game: the first optimal move
+    entry = load().probe(board, player)
+    if entry is None or not entry[2]:
+        return None
+    best = entry[2]
+    return divmod((best & -best).bit_length() - 1, bitboard.SIZE)
+
+
+##########################################
+# SELF-CHECK                             #
+##########################################
+
+def check():
+    # Builds a fresh tablebase in a temporary directory and compares it with
+    # solver.py on every position the solver reaches: same sign of value and
+    # same best-move mask. Returns a list of (x, o, player) that disagree
+    import solver  # solves the whole game on import
+    solver.solve()
+    mismatches = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tb = Tablebase(build(os.path.join(tmp, 'tablebase.bin')))
+        for key, (score, best) in solver._table.items():
+            me, opp = key & bitboard.FULL, key >> bitboard.CELLS
+            for player in bitboard.PLAYERS:
+                x, o = (me, opp) if player == 'X' else (opp, me)
+                i = index(x, o, player)
+                if tb.dtes[i] == UNREACHABLE:
+                    continue
+                value = tb.values[i]
+                if (value > 0) - (value < 0) != (score > 0) - (score < 0) or tb.bests[i] != best:
+                    mismatches.append((x, o, player))
+    return mismatches
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'build'
+    path = sys.argv[2] if len(sys.argv) > 2 else PATH
+    if command == 'build':
+        print(f'wrote {build(path)}')
+    elif command == 'verify':
+        tb = Tablebase(path)
+        reachable = sum(d != UNREACHABLE for d in tb.dtes)
+        print(f'{path}: version {VERSION}, {reachable} reachable positions, checksum ok')
+    elif command == 'check':
+        mismatches = check()
+        for x, o, player in mismatches[:10]:
+            print(f'mismatch: x={x:09b} o={o:09b} {player} to move')
+        if mismatches:
+            sys.exit(f'{len(mismatches)} positions disagree with solver.py')
+        print('tablebase agrees with solver.py')
+    else:
+        sys.exit(f'unknown command {command!r}; use build, verify or check')
@@ -0,0 +1,235 @@
+##########################################
+# SELF-PLAY TOURNAMENTS                  #
+##########################################
+# Plays headless games between bots across a process pool and aggregates
+# the results per pairing (X player vs O player).
+#
+# Players are named by spec strings so they can be sent to workers:
+#   random              uniformly random legal move
+#   heuristic           win, else block, else centre, corner, edge
+#   solver              perfect play (tablebase.py), random among best moves
+#   scripted:1,1;0,0    plays the listed moves in order while they are
+#                       legal, then falls back to random
+#
+# Games are split into batches; each worker plays a whole batch and sends
+# back a small summary, which is merged as soon as it arrives. Workers
+# share the mmap'ed tablebase instead of each solving the game again.
+#
+#   python tournament.py random heuristic solver --games 10000
+
+from collections import Counter
+import argparse
+import itertools
+import json
+import multiprocessing
+import random
+import time
+
+import bitboard
+import game
+import mnk
+import moveparse
+import tablebase
+
+
+##########################################
+# PLAYERS                                #
+##########################################
+
+def _empty_cells(board):
+    return [(r, c) for r, row in enumerate(board) for c, v in enumerate(row)
+            if v == mnk.EMPTY]
+
+
+def random_player(rng):
+    def provider(board, player):
+        return rng.choice(_empty_cells(board))
+    return provider
+
+
+# centre, corners, edges
+_PREFERENCE = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+
+def heuristic_player(rng):
+    def provider(board, player):
+        x, o = bitboard.from_board(board)
+        me, opp = (x, o) if player == 'X' else (o, x)
+        empty = bitboard.legal_mask(x, o)
+        for bits in (me, opp):  # win first, then block
+            for c in bitboard.iter_cells(empty):
+                if bitboard.FIRST_LINE[bits | (1 << c)] >= 0:
+                    return divmod(c, bitboard.SIZE)
+        for c in _PREFERENCE:
+            if empty >> c & 1:
+                return divmod(c, bitboard.SIZE)
+    return provider
+
+
+def solver_player(rng):
+    def provider(board, player):
+        return rng.choice(tablebase.best_moves(board, player))
+    return provider
+
+
+def scripted_player(rng, moves):
+    # Cells never empty again, so "the first listed move still empty" is
+    # the next move of the script; no per-game state to reset
+    script = [m for m in moveparse.parse_move_list(moves)
+              if not moveparse.is_error(m)]
+    fallback = random_player(rng)
+
+    def provider(board, player):
+        for move in script:
+            if board[move[0]][move[1]] == mnk.EMPTY:
+                return move
+        return fallback(board, player)
+    return provider
+
+
+PLAYERS = {
+    'random': random_player,
+    'heuristic': heuristic_player,
+    'solver': solver_player,
+}
+
+
+def make_player(spec, rng):
+    name, _, arg = spec.partition(':')
+    if name == 'scripted':
+        return scripted_player(rng, arg)
+    if name not in PLAYERS:
+        raise ValueError(f'unknown player {spec!r}')
+    return PLAYERS[name](rng)
+
+
+##########################################
+# GAMES                                  #
+##########################################
+
+def new_stats():
+    return {
+        'games': 0,
+        'x_wins': 0,
+        'o_wins': 0,
+        'draws': 0,
+        'moves': 0,
+        'lengths': [0] * (bitboard.CELLS + 1),
+        'openings': Counter(),
+    }
+
+
+def merge_stats(into, stats):
+    for key in ('games', 'x_wins', 'o_wins', 'draws', 'moves'):
+        into[key] += stats[key]
+    into['lengths'] = [a + b for a, b in zip(into['lengths'], stats['lengths'])]
+    into['openings'].update(stats['openings'])
+    return into
+
+
+def play_batch(x_spec, o_spec, n_games, seed):
+    # Runs in a worker: plays n_games and returns (x_spec, o_spec, stats).
+    # The opening is the first two moves, e.g. "1,1;0,0"
+    rng = random.Random(seed)
+    players = {'X': make_player(x_spec, rng), 'O': make_player(o_spec, rng)}
+    stats = new_stats()
+    for _ in range(n_games):
+        state = game.run_game(mnk.TICTACTOE, players, 'X', echo=False)
+        stats['games'] += 1
+        if state.winner == 'X':
+            stats['x_wins'] += 1
+        elif state.winner == 'O':
+            stats['o_wins'] += 1
+        else:
+            stats['draws'] += 1
+        stats['moves'] += state.move_count
+        stats['lengths'][state.move_count] += 1
+        stats['openings'][';'.join(f'{r},{c}' for r, c in state.history[:2])] += 1
+    return x_spec, o_spec, stats
+
+
+def _batches(pairs, games, batch_size, seed):
+    n = 0
+    for x_spec, o_spec in pairs:
+        for start in range(0, games, batch_size):
+            yield x_spec, o_spec, min(batch_size, games - start), seed + n
+            n += 1
+
+
+def _play_batch_args(args):
+    return play_batch(*args)
+
+
+def run_tournament(players, games=1000, pairs=None, jobs=None, batch_size=500,
+                   seed=0, on_batch=None):
+    # Plays games per pairing (every ordered pair of players, self-play
+    # included, unless pairs is given) and returns
+    # {(x_spec, o_spec): stats}. on_batch(x_spec, o_spec, stats) is called
+    # for every batch as it comes back
+    if pairs is None:
+        pairs = list(itertools.product(players, repeat=2))
+    results = {pair: new_stats() for pair in pairs}
+    with multiprocessing.Pool(jobs) as pool:
+        for x_spec, o_spec, stats in pool.imap_unordered(
+                _play_batch_args, _batches(pairs, games, batch_size, seed)):
+            merge_stats(results[(x_spec, o_spec)], stats)
+            if on_batch:
+                on_batch(x_spec, o_spec, stats)
+    return results
+
+
+def summarize(results, top_openings=3):
+    # rates and averages per pairing, ready for printing or JSON
+    summary = []
+    for (x_spec, o_spec), s in results.items():
+        n = s['games'] or 1
+        summary.append({
+            'x': x_spec,
+            'o': o_spec,
+            'games': s['games'],
+            'x_win_rate': s['x_wins'] / n,
+            'draw_rate': s['draws'] / n,
+            'o_win_rate': s['o_wins'] / n,
+            'mean_length': s['moves'] / n,
+            'lengths': s['lengths'],
+            'openings': s['openings'].most_common(top_openings),
+        })
+    return summary
+
+
+def print_summary(summary, seconds):
+    width = max(len(f'{s["x"]} vs {s["o"]}') for s in summary)
+    print(f'{"pairing (X vs O)":{width}s}  {"games":>7s}  {"X win":>6s}  '
+          f'{"draw":>6s}  {"O win":>6s}  {"length":>6s}  top openings')
+    total = 0
+    for s in summary:
+        total += s['games']
+        openings = ', '.join(f'{o} ({n})' for o, n in s['openings'])
+        print(f'{s["x"] + " vs " + s["o"]:{width}s}  {s["games"]:7d}  '
+              f'{s["x_win_rate"]:6.1%}  {s["draw_rate"]:6.1%}  '
+              f'{s["o_win_rate"]:6.1%}  {s["mean_length"]:6.2f}  {openings}')
+    print(f'\n{total} games in {seconds:.2f}s ({total / seconds:.0f} games/s)')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Self-play tictactoe tournament')
+    parser.add_argument('players', nargs='+', help='player specs, e.g. random solver')
+    parser.add_argument('--games', type=int, default=1000, help='games per pairing')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='worker processes (default: one per core)')
+    parser.add_argument('--batch', type=int, default=500, help='games per batch')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', dest='json_path', help='write the summary as JSON')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    start = time.perf_counter()
+    results = run_tournament(args.players, args.games, jobs=args.jobs,
+                             batch_size=args.batch, seed=args.seed)
+    summary = summarize(results)
+    print_summary(summary, time.perf_counter() - start)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(summary, f, indent=2)
@@ -0,0 +1,150 @@
+##########################################
+# TRANSPOSITION TABLE                    #
+##########################################
+# Fixed-size hash table for search results keyed by 64-bit Zobrist hashes
+# (see game.zobrist and GameState.hash). Memory is set once by the number
+# of entries, so it stays bounded however big the board gets; when the
+# table is full a replacement policy decides what is kept:
+#
+#   always      the new entry always wins its slot
+#   depth       a slot only takes entries searched at least as deep as the
+#               one it holds (or the same position again)
+#   two-tier    buckets of two slots: a depth-preferred slot, with an
+#               always-replace slot taking whatever it turns away or
+#               pushes out
+#
+# Each slot is two 64-bit words, key ^ data and data, so a table shared
+# between processes (search.py) can be written without locks: a torn
+# write no longer matches its key and reads as a miss.
+#
+# Counters: probes, hits, collisions (the slot held another position),
+# stores, evictions (a stored entry displaced another position) and
+# rejections (the depth-preferred policy kept the old entry).
+
+from array import array
+
+EXACT, LOWER, UPPER = 1, 2, 3
+POLICIES = ('always', 'depth', 'two-tier')
+
+SCORE_BIAS = 1 << 21
+_SCORE_MASK = (1 << 22) - 1
+
+
+def pack(depth, flag, score, move):
+    # score in [-2**21, 2**21), depth < 256, move a cell index or -1
+    return (score + SCORE_BIAS) | depth << 22 | flag << 30 | (move + 1) << 32
+
+
+def unpack(data):
+    # data -> (depth, flag, score, move)
+    return ((data >> 22) & 0xFF, (data >> 30) & 0x3,
+            (data & _SCORE_MASK) - SCORE_BIAS, (data >> 32) - 1)
+
+
+class TranspositionTable:
+    """ Bounded transposition table with a replacement policy """
+
+    def __init__(self, entries=1 << 16, policy='two-tier', words=None, offset=0):
+        # entries is rounded down to a power of two. words, if given, is a
+        # writable sequence of 64-bit words to keep the slots in (such as a
+        # cast memoryview over shared memory), starting at offset
+        if policy not in POLICIES:
+            raise ValueError(f'unknown policy {policy!r}, expected one of {POLICIES}')
+        self.policy = policy
+        self.ways = 2 if policy == 'two-tier' else 1
+        self.entries = 1 << max(self.ways - 1, entries.bit_length() - 1)
+        self.buckets = self.entries // self.ways
+        self.mask = self.buckets - 1
+        if words is None:
+            words = array('Q', bytes(16 * self.entries))
+        elif len(words) < offset + 2 * self.entries:
+            raise ValueError('buffer too small for the table')
+        self.words = words
+        self.offset = offset
+        self.reset_stats()
+
+    @staticmethod
+    def size_in_words(entries, policy='two-tier'):
+        ways = 2 if policy == 'two-tier' else 1
+        return 2 * (1 << max(ways - 1, entries.bit_length() - 1))
+
+    def reset_stats(self):
+        self.probes = self.hits = self.collisions = 0
+        self.stores = self.evictions = self.rejections = 0
+
+    def clear(self):
+        w = self.words
+        for i in range(self.offset, self.offset + 2 * self.entries):
+            w[i] = 0
+
+    def _bucket(self, key):
+        return self.offset + 2 * self.ways * (key & self.mask)
+
+    def probe(self, key):
+        # (depth, flag, score, move) for key, or None
+        self.probes += 1
+        w = self.words
+        i = self._bucket(key)
+        for j in range(i, i + 2 * self.ways, 2):
+            data = w[j + 1]
+            if data:
+                if w[j] ^ data == key:
+                    self.hits += 1
+                    return unpack(data)
+                self.collisions += 1
+        return None
+
+    def store(self, key, depth, flag, score, move):
+        # returns False when the policy turned the entry away
+        w = self.words
+        i = self._bucket(key)
+        data = pack(depth, flag, score, move)
+        old = w[i + 1]
+        if old and w[i] ^ old != key:
+            deeper = (old >> 22) & 0xFF > depth
+            if self.policy == 'always':
+                self.evictions += 1
+            elif self.policy == 'depth':
+                if deeper:
+                    self.rejections += 1
+                    return False
+                self.evictions += 1
+            else:
+                j = i + 2
+                tail = w[j + 1]
+                if tail and w[j] ^ tail != key:
+                    self.evictions += 1
+                if deeper:
+                    i = j  # tier one keeps the deeper entry
+                else:
+                    w[j], w[j + 1] = w[i], old  # the displaced entry drops a tier
+        elif self.policy == 'two-tier':
+            # tier one is free or holds this position: drop any stale copy
+            # in tier two
+            j = i + 2
+            tail = w[j + 1]
+            if tail and w[j] ^ tail == key:
+                w[j] = w[j + 1] = 0
+        w[i] = key ^ data
+        w[i + 1] = data
+        self.stores += 1
+        return True
+
+    def filled(self):
+        # occupied slots; scans the table
+        w = self.words
+        return sum(1 for j in range(self.offset + 1, self.offset + 2 * self.entries, 2)
+                   if w[j])
+
+    def stats(self):
+        return {
+            'policy': self.policy,
+            'entries': self.entries,
+            'probes': self.probes,
+            'hits': self.hits,
+            'hit_rate': self.hits / self.probes if self.probes else 0.0,
+            'collisions': self.collisions,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'rejections': self.rejections,
+        }
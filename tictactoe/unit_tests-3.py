@@ -1,12 +1,19 @@
 from inspect import getmembers, isfunction, signature
 from contextlib import contextmanager
 from importlib import import_module
+import multiprocessing
+import argparse
+import json
 import os
+import signal
 import sys
+import time
 from io import StringIO
 import traceback
 import re
 
+from harness import CallTimeout, load_script, raise_timeout
+
 ##########################################
 # CLASS FOR COOL, FANCY COLORS. YAY!     #
 ##########################################
@@ -97,38 +104,66 @@ def p_aux_args(f, args, stdin=None):
         p_aux(f'{n}: {repr(a)}')
     
 
+# Buffers for suppressed output and fake keyboard input, reused by every
+# call instead of opening os.devnull each time. They are emptied before each
+# call so they never grow past one call's worth of text
+_stdout_buf = StringIO()
+_stdin_buf = StringIO()
+
+def _reset(buf, text=''):
+    buf.seek(0)
+    buf.truncate()
+    buf.write(text)
+    buf.seek(0)
+
+# Seconds a single call may run before it is failed (0 = no limit). Only
+# enforced where SIGALRM exists; set by the headless runner
+call_timeout = 0
+
+# function name -> [calls, total seconds, slowest call] for every function
+# called through safe_call in this process
+timings = {}
+
+def _record_time(f, seconds):
+    t = timings.setdefault(f.__name__, [0, 0.0, 0.0])
+    t[0] += 1
+    t[1] += seconds
+    t[2] = max(t[2], seconds)
+
 # Returns (True, ret) when function returns without an exception
 # Returns (False, None) when function fails
 def safe_call(f, args, suppress_stdout=True, stdin=None):
     # Suppress stdout and/or get stdin from string
+    old_stdout, old_stdin = sys.stdout, sys.stdin
     if suppress_stdout:
-        devnull = open(os.devnull, 'w')
-        old_stdout = sys.stdout
-        sys.stdout = devnull
+        _reset(_stdout_buf)
+        sys.stdout = _stdout_buf
     if stdin != None:
-        old_stdin = sys.stdin
-        sys.stdin = StringIO(stdin)
+        _reset(_stdin_buf, stdin)
+        sys.stdin = _stdin_buf
+    use_alarm = call_timeout and hasattr(signal, 'SIGALRM')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, call_timeout)
 
     # Call function
+    start = time.perf_counter()
     try:
-        ret = f(*args)
-
-        # Reset stdout/stdin
-        if suppress_stdout:
-            sys.stdout = old_stdout
-        if stdin != None:
-            sys.stdin = old_stdin
-
+        try:
+            ret = f(*args)
+        finally:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+            _record_time(f, time.perf_counter() - start)
+            # Reset stdout/stdin
+            sys.stdout, sys.stdin = old_stdout, old_stdin
         return True, ret
 
-    except (Exception, SystemExit) as e:
-        # Reset stdout/stdin
-        if suppress_stdout:
-            sys.stdout = old_stdout
-        if stdin != None:
-            sys.stdin = old_stdin
-
-        if isinstance(e, SystemExit):
+    except (Exception, SystemExit, CallTimeout) as e:
+        if isinstance(e, CallTimeout):
+            p_fail(f'Function did not return within {call_timeout}s')
+            p_aux_args(f, args, stdin=stdin)
+        elif isinstance(e, SystemExit):
             p_fail('quit() or exit() was called and function did not return')
             p_aux_args(f, args, stdin=stdin)
         else:
@@ -416,23 +451,32 @@ def pick_tier():
             print(f'  Invalid entry: {tier}')
     return tier
 
-def run_tests(tictactoe, fnames_to_test, tier):
-    jmp_table = {
-        'play_game': test_play_game,
-        'print_board': test_print_board,
-        'get_winner': test_get_winner,
-        'get_winner_rows': test_get_winner_rows,
-        'get_next_move': test_get_next_move,
-        'get_winner_cols': test_get_winner_cols,
-        'get_winner_diag': test_get_winner_diag,
-        'input_str_is_valid': test_input_str_is_valid,
-        'move_is_valid': test_move_is_valid
-    }
+TEST_FUNCTIONS = {
+    'play_game': test_play_game,
+    'print_board': test_print_board,
+    'get_winner': test_get_winner,
+    'get_winner_rows': test_get_winner_rows,
+    'get_next_move': test_get_next_move,
+    'get_winner_cols': test_get_winner_cols,
+    'get_winner_diag': test_get_winner_diag,
+    'input_str_is_valid': test_input_str_is_valid,
+    'move_is_valid': test_move_is_valid
+}
+
+REGISTERED_FNAMES = (
+    ('play_game', 'print_board', 'get_winner', 'get_winner_rows'),
+    ('play_game', 'print_board', 'get_winner', 'get_winner_rows',
+    'get_next_move', 'get_winner_cols', 'get_winner_diag'),
+    ('play_game', 'print_board', 'get_winner', 'get_winner_rows',
+    'get_next_move', 'get_winner_cols', 'get_winner_diag',
+    'input_str_is_valid', 'move_is_valid')
+)
 
+def run_tests(tictactoe, fnames_to_test, tier):
     # Run tests
     stats = []
     for name in fnames_to_test:
-        test_fcn = jmp_table[name]
+        test_fcn = TEST_FUNCTIONS[name]
         p_hdr(f'Testing function "{name}"')
         stats.append((name, test_fcn(tictactoe, tier)))
     return stats
@@ -459,14 +503,7 @@ def init_tests():
         exit()
 
     p_info(f'Attempting to load functions for {tier_strs[tier]} tier')
-    registered_fnames = (
-        ('play_game', 'print_board', 'get_winner', 'get_winner_rows'),
-        ('play_game', 'print_board', 'get_winner', 'get_winner_rows',
-        'get_next_move', 'get_winner_cols', 'get_winner_diag'),
-        ('play_game', 'print_board', 'get_winner', 'get_winner_rows',
-        'get_next_move', 'get_winner_cols', 'get_winner_diag',
-        'input_str_is_valid', 'move_is_valid')
-    )
+    registered_fnames = REGISTERED_FNAMES
 
     # getmembers returns list of (function name, function object)
     all_available_fnames = [val[0] for val in getmembers(tictactoe, isfunction)]
@@ -507,6 +544,125 @@ def init_tests():
     print(f'{Colors.DARK_GRAY}+' + '-' * box_contents_width + f'+{Colors.END}')
 
 
+##########################################
+# HEADLESS PARALLEL ENGINE               #
+##########################################
+# Runs each test_* function in its own worker process, in parallel, with
+# a per-call timeout, and collects a structured report: pass counts, the
+# captured test log and how long every function under test took.
+
+def run_one(script, name, tier, timeout):
+    # Runs in a worker: one test_* function, with its log captured
+    global call_timeout
+    call_timeout = timeout
+    timings.clear()
+    log = StringIO()
+    old_stdout = sys.stdout
+    sys.stdout = log
+    start = time.perf_counter()
+    status = 'ok'
+    total = passed = 0
+    try:
+        total, passed = TEST_FUNCTIONS[name](load_script(script), tier)
+    except (Exception, SystemExit):
+        status = 'error'
+        traceback.print_exc(file=log)
+    finally:
+        sys.stdout = old_stdout
+    return {
+        'name': name,
+        'status': status,
+        'total': total,
+        'passed': passed,
+        'seconds': time.perf_counter() - start,
+        'timings': {f: {'calls': t[0], 'total_seconds': t[1], 'max_seconds': t[2]}
+                    for f, t in timings.items()},
+        'log': log.getvalue(),
+    }
+
+
+def available_fnames(script):
+    return [val[0] for val in getmembers(load_script(script), isfunction)]
+
+
+def run_headless(script='tictactoe', tier=COMPLETE, jobs=None, timeout=2.0,
+                 json_path=None):
+    start = time.perf_counter()
+    available = available_fnames(script)
+    names = [n for n in REGISTERED_FNAMES[tier] if n in available]
+    missing = [n for n in REGISTERED_FNAMES[tier] if n not in available]
+
+    # Each test makes at most ~10 calls, so this only fires on a worker
+    # that is stuck where the per-call alarm can't reach it
+    worker_timeout = timeout * 20 + 5
+    with multiprocessing.Pool(jobs) as pool:
+        pending = [pool.apply_async(run_one, (script, n, tier, timeout))
+                   for n in names]
+        results = []
+        for name, job in zip(names, pending):
+            try:
+                results.append(job.get(worker_timeout))
+            except multiprocessing.TimeoutError:
+                results.append({'name': name, 'status': 'timeout', 'total': 0,
+                                'passed': 0, 'seconds': worker_timeout,
+                                'timings': {}, 'log': ''})
+        pool.terminate()
+
+    report = {
+        'script': script,
+        'tier': ('base', 'moderate', 'complete')[tier],
+        'total': sum(r['total'] for r in results),
+        'passed': sum(r['passed'] for r in results),
+        'seconds': time.perf_counter() - start,
+        'tests': results,
+        'not_found': missing,
+    }
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def print_report(report, verbose=False):
+    width = max([len(r['name']) for r in report['tests']] + [len(n) for n in report['not_found']] + [1])
+    for r in report['tests']:
+        if verbose:
+            p_hdr(f'Testing function "{r["name"]}"')
+            print(r['log'], end='')
+        slowest = max((t['max_seconds'] for t in r['timings'].values()), default=0.0)
+        color = Colors.GREEN if r['status'] == 'ok' and r['passed'] == r['total'] else Colors.RED
+        print(f'{r["name"]:{width}s}  {color}{r["passed"]:2d} of {r["total"]:2d} passed{Colors.END}'
+            + f'  {r["status"]:7s}  slowest call {slowest * 1e6:9.1f} us')
+    for name in report['not_found']:
+        print(f'{name:{width}s}  {Colors.YELLOW}not tested{Colors.END}')
+    print(f'\n{Colors.YELLOW}{report["passed"]}{Colors.END} of '
+        + f'{Colors.YELLOW}{report["total"]}{Colors.END} checks passed '
+        + f'({report["seconds"]:.2f}s)')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Unit tests for tictactoe')
+    parser.add_argument('--headless', action='store_true',
+                        help='run every test in parallel without prompts')
+    parser.add_argument('--script', default='tictactoe',
+                        help='module name or path to the .py file to test')
+    parser.add_argument('--tier', type=int, choices=(1, 2, 3), default=3)
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='worker processes (default: one per core)')
+    parser.add_argument('--timeout', type=float, default=2.0,
+                        help='seconds allowed per call to a tested function')
+    parser.add_argument('--json', dest='json_path', help='write a JSON report')
+    parser.add_argument('--verbose', action='store_true',
+                        help='print the log of every test')
+    return parser.parse_args()
+
+
 if __name__ == '__main__':
+    args = parse_args()
+    if args.headless:
+        report = run_headless(args.script, args.tier - 1, args.jobs, args.timeout,
+                              args.json_path)
+        print_report(report, args.verbose)
+        sys.exit(0 if report['passed'] == report['total'] and not report['not_found'] else 1)
     init_tests()
     print(f'\n\n{Colors.PURPLE}All tests complete.{Colors.END}')
@@ -0,0 +1,236 @@
+##########################################
+# EXHAUSTIVE VERIFICATION                #
+##########################################
+# Plays every legal game from the empty board (X first, 255,168 games) and
+# checks get_winner, get_winner_rows/cols/diag and move_is_valid of a
+# script against an oracle at every position on the way.
+#
+# The game tree is split on its first SPLIT moves and the subtrees are
+# walked across a process pool. Within a subtree each distinct position is
+# checked once (the functions only see the board); --all-nodes checks
+# every node of every game instead. A disagreement is reported with the
+# moves that lead to it.
+#
+# The tablebase the hint and solver players read from (tablebase.py) is
+# also rebuilt from scratch in a temporary directory and compared with
+# solver.py, unless --no-tablebase is given.
+#
+#   python verify.py                     verify main.py
+#   python verify.py --script other.py --jobs 8
+
+from io import StringIO
+import argparse
+import itertools
+import multiprocessing
+import sys
+import time
+
+import bitboard
+from harness import load_script
+import tablebase
+
+SPLIT = 2
+# the game tree from the empty board with X moving first
+EXPECTED_GAMES = {'X': 131184, 'O': 77904, None: 46080}
+# out-of-range moves on top of the 9 cells
+OFF_BOARD = ((3, 0), (0, 3), (3, 2), (3, 3), (-1, 0), (0, -1), (10, 10))
+
+_script = None
+
+
+##########################################
+# ORACLE                                 #
+##########################################
+
+# The lines are written out cell by cell rather than taken from bitboard,
+# so a mistake in its masks cannot hide behind the oracle
+ROWS = tuple(tuple((r, c) for c in range(3)) for r in range(3))
+COLS = tuple(tuple((r, c) for r in range(3)) for c in range(3))
+DIAGS = (((0, 0), (1, 1), (2, 2)), ((0, 2), (1, 1), (2, 0)))
+
+ORACLES = {
+    'get_winner': ROWS + COLS + DIAGS,
+    'get_winner_rows': ROWS,
+    'get_winner_cols': COLS,
+    'get_winner_diag': DIAGS,
+}
+
+
+def _owner(board, lines):
+    # in a legal game only the last mover can own a line
+    for line in lines:
+        marks = {board[r][c] for r, c in line}
+        if len(marks) == 1 and marks != {'-'}:
+            return marks.pop()
+    return None
+
+
+def check_position(module, x, o):
+    # list of (function, args, expected, got) where module disagrees with
+    # the oracle on this position
+    board = bitboard.to_board(x, o)
+    problems = []
+    for name, lines in ORACLES.items():
+        expected = _owner(board, lines)
+        got = _call(getattr(module, name), [row[:] for row in board])
+        if got != expected:
+            problems.append((name, '', expected, got))
+    for move in itertools.chain(((c // 3, c % 3) for c in range(bitboard.CELLS)), OFF_BOARD):
+        r, c = move
+        expected = 0 <= r < 3 and 0 <= c < 3 and board[r][c] == '-'
+        got = _call(module.move_is_valid, [row[:] for row in board], move)
+        if got != expected:
+            problems.append(('move_is_valid', move, expected, got))
+    return problems
+
+
+def _call(f, *args):
+    # the result of f, or the exception it raised as a string
+    try:
+        return f(*args)
+    except Exception as e:
+        return f'{type(e).__name__}: {e}'
+
+
+##########################################
+# ENUMERATION                            #
+##########################################
+
+def _init_worker(script):
+    global _script
+    _script = load_script(script)
+
+
+def verify_subtree(prefix, all_nodes=False):
+    # Runs in a worker: walks every game starting with the cells in prefix.
+    # Returns (games by winner, positions checked, [(moves, problem)])
+    games = {'X': 0, 'O': 0, None: 0}
+    seen = set()
+    failures = []
+    bits = [0, 0]
+    moves = []
+    old_stdout = sys.stdout
+    sys.stdout = sink = StringIO()
+
+    def visit(to_move):
+        x, o = bits
+        if all_nodes or (x, o) not in seen:
+            seen.add((x, o))
+            for problem in check_position(_script, x, o):
+                failures.append((tuple(moves), problem))
+            sink.seek(0)
+            sink.truncate()
+        mover = to_move ^ 1
+        if moves and bitboard.FIRST_LINE[bits[mover]] >= 0:
+            games['XO'[mover]] += 1
+            return
+        empty = bitboard.legal_mask(x, o)
+        if not empty:
+            games[None] += 1
+            return
+        for c in bitboard.iter_cells(empty):
+            bits[to_move] |= 1 << c
+            moves.append(divmod(c, 3))
+            visit(mover)
+            moves.pop()
+            bits[to_move] &= ~(1 << c)
+
+    try:
+        for i, c in enumerate(prefix):
+            bits[i % 2] |= 1 << c
+            moves.append(divmod(c, 3))
+        visit(len(prefix) % 2)
+    finally:
+        sys.stdout = old_stdout
+    return games, len(seen), failures
+
+
+def _verify_args(args):
+    return verify_subtree(*args)
+
+
+def prefixes(depth=SPLIT):
+    # every legal opening of depth moves; nobody can win that early
+    return itertools.permutations(range(bitboard.CELLS), depth)
+
+
+def run(script='main.py', jobs=None, all_nodes=False):
+    # positions from the moves before SPLIT are checked by the parent
+    module = load_script(script)
+    games = {'X': 0, 'O': 0, None: 0}
+    failures = []
+    positions = 0
+    old_stdout = sys.stdout
+    sys.stdout = StringIO()
+    try:
+        for depth in range(SPLIT):
+            for prefix in prefixes(depth):
+                x = o = 0
+                for i, c in enumerate(prefix):
+                    if i % 2:
+                        o |= 1 << c
+                    else:
+                        x |= 1 << c
+                positions += 1
+                for problem in check_position(module, x, o):
+                    failures.append((tuple(divmod(c, 3) for c in prefix), problem))
+    finally:
+        sys.stdout = old_stdout
+    with multiprocessing.Pool(jobs, initializer=_init_worker, initargs=(script,)) as pool:
+        for g, n, f in pool.imap_unordered(
+                _verify_args, ((p, all_nodes) for p in prefixes())):
+            for k in games:
+                games[k] += g[k]
+            positions += n
+            failures.extend(f)
+    failures.sort(key=lambda f: (len(f[0]), f[0]))
+    return games, positions, failures
+
+
+def print_report(games, positions, failures, seconds, max_report=20):
+    total = sum(games.values())
+    print(f'{total} games (X {games["X"]}, O {games["O"]}, draws {games[None]}), '
+          f'{positions} position checks in {seconds:.2f}s')
+    if games != EXPECTED_GAMES:
+        print(f'game tree mismatch: expected {EXPECTED_GAMES}')
+    by_function = {}
+    for moves, (name, args, expected, got) in failures:
+        by_function.setdefault(name, []).append((moves, args, expected, got))
+    for name, rows in by_function.items():
+        print(f'\n{name}: {len(rows)} disagreements')
+        for moves, args, expected, got in rows[:max_report]:
+            seq = ';'.join(f'{r},{c}' for r, c in moves)
+            call = f'{name}({args})' if args != '' else name
+            print(f'  after {seq or "(empty board)"}: {call} expected {expected!r}, got {got!r}')
+    if not failures:
+        print('all functions agree with the oracle')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Exhaustive tictactoe verification')
+    parser.add_argument('--script', default='main.py',
+                        help='module name or path of the script to verify')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='worker processes (default: one per core)')
+    parser.add_argument('--all-nodes', action='store_true',
+                        help='check every node of every game, not each position once')
+    parser.add_argument('--max-report', type=int, default=20,
+                        help='disagreements listed per function')
+    parser.add_argument('--no-tablebase', action='store_true',
+                        help='skip rebuilding the tablebase and checking it against solver.py')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    start = time.perf_counter()
+    games, positions, failures = run(args.script, args.jobs, args.all_nodes)
+    print_report(games, positions, failures, time.perf_counter() - start, args.max_report)
+    mismatches = []
+    if not args.no_tablebase:
+        mismatches = tablebase.check()
+        if mismatches:
+            print(f'tablebase: {len(mismatches)} positions disagree with solver.py')
+        else:
+            print('tablebase built from scratch agrees with solver.py')
+    sys.exit(1 if failures or mismatches or games != EXPECTED_GAMES else 0)